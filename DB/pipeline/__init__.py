@@ -0,0 +1,6 @@
+"""
+Shared helpers for the DB extraction scripts.
+
+The per-category scripts under DB/<Category>/ import from this package,
+so it is importable both from the DB folder and from a category folder.
+"""
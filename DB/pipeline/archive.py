@@ -0,0 +1,83 @@
+"""
+Per-category archive of fetched item pages.
+
+With --archive the RAW stage stores every page it fetches in
+DB/.archive/<Category>_Pages.sqlite (zlib-compressed, keyed by URL);
+--from-archive then re-runs extraction from that file with no network at
+all, opening it read-only. Unlike the page cache, an archive is never
+evicted, so it doubles as a reproducible corpus for parser changes.
+"""
+import os
+import sqlite3
+import time
+import zlib
+from urllib.request import pathname2url
+
+from pipeline.profiles import DB_DIR
+
+DEFAULT_ARCHIVE_DIR = os.path.join(DB_DIR, ".archive")
+COMMIT_EVERY = 100
+
+
+def archive_file(profile, archive_dir=DEFAULT_ARCHIVE_DIR):
+    return os.path.join(archive_dir, f"{profile.name}_Pages.sqlite")
+
+
+class PageArchive:
+    """
+    SQLite file of item pages for one category. With `readonly` the file
+    must already exist (FileNotFoundError otherwise) and is never written.
+    """
+
+    def __init__(self, path, readonly=False):
+        self.readonly = readonly
+        if readonly:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No page archive at '{path}'")
+            self.conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.conn = sqlite3.connect(path)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, body BLOB, fetched_at REAL)"
+            )
+        self.uncommitted = 0
+
+    def put(self, url, html):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+            (url, zlib.compress(html.encode("utf-8")), time.time()),
+        )
+        self.uncommitted += 1
+        if self.uncommitted >= COMMIT_EVERY:
+            self.conn.commit()
+            self.uncommitted = 0
+
+    def get(self, url):
+        row = self.conn.execute("SELECT body FROM pages WHERE url = ?", (url,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def urls(self):
+        return {row[0] for row in self.conn.execute("SELECT url FROM pages")}
+
+    def close(self):
+        if not self.readonly:
+            self.conn.commit()
+        self.conn.close()
+
+
+def archive_pages(pages, archive):
+    """
+    Pass (url, html) pairs through, storing each page in `archive`.
+    """
+    for url, html in pages:
+        archive.put(url, html)
+        yield url, html
+
+
+def read_pages(archive, urls):
+    """
+    Yield (url, html) for `urls` from an archive instead of the network.
+    """
+    for url in urls:
+        yield url, archive.get(url)
@@ -0,0 +1,334 @@
+"""
+Build every artifact of the gear DB in one command, skipping what is up to date.
+
+    python -m pipeline.build                        # every category
+    python -m pipeline.build -c Wands Boots --jobs 4
+    python -m pipeline.build --refresh-urls         # also crawl the listings again
+    python -m pipeline.build --dry-run              # only show what would run
+
+Each category is three steps, urls -> raw -> final, and a last "manifest"
+step (DB/Shards_Manifest.json and DB/Stat_IDs.json) needs every final
+step. Steps run on --jobs threads as soon as the steps they need are done,
+so categories are built in parallel; they share one scraper, page cache,
+fetch pool and item store, as in `python -m pipeline`, and take the same
+options (see pipeline.cli). With --profile, steps run one at a time, as
+cProfile can only profile one thread at once.
+
+After a step runs, DB/.build_stamps.json records the sha256 of its input
+files, its output files and the pipeline modules it runs. Next time, the
+step is skipped if all of these still match: a new URL list reruns the
+category's raw and final steps, a changed or missing output reruns the
+step that writes it, and editing pipeline/final.py reruns every final step.
+The urls step reads the wiki rather than a file; once <Category>_URL.json
+exists it only runs again with --refresh-urls (or --force, which reruns
+everything). Run metrics are written as in `python -m pipeline`.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+from pipeline.archive import DEFAULT_ARCHIVE_DIR, archive_file
+from pipeline.cli import add_run_options, open_scraper
+from pipeline.final import derived_outputs, run_final
+from pipeline.listing import run_listings
+from pipeline.memo import TransformMemo
+from pipeline.metrics import METRICS
+from pipeline.profiles import DB_DIR, PROFILES, final_file, get_profile, raw_file, url_file
+from pipeline.profiling import StageProfiler
+from pipeline.raw import run_raw
+from pipeline.shards import MANIFEST_FILE, category_manifest_file, write_manifest
+from pipeline.stats import STAT_IDS_FILE, write_stat_ids
+from pipeline.store import ItemStore
+
+STAMPS_FILE = os.path.join(DB_DIR, ".build_stamps.json")
+PACKAGE_DIR = os.path.join(DB_DIR, "pipeline")
+IMPORT = re.compile(r"^from pipeline\.(\w+) import", re.MULTILINE)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def module_closure(module):
+    """
+    Return the pipeline modules `module` imports, directly or not, and itself.
+    """
+    seen = set()
+    todo = [module]
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        with open(os.path.join(PACKAGE_DIR, f"{name}.py"), "r", encoding="utf-8") as f:
+            todo.extend(IMPORT.findall(f.read()))
+    return sorted(seen)
+
+
+def code_hash(module):
+    digest = hashlib.sha256()
+    for name in module_closure(module):
+        with open(os.path.join(PACKAGE_DIR, f"{name}.py"), "rb") as f:
+            digest.update(name.encode() + b"\0" + f.read())
+    return digest.hexdigest()
+
+
+class Step:
+    """
+    One node of the build graph.
+
+    `inputs` and `outputs` are file paths, `module` the pipeline module
+    whose code (with everything it imports) the step runs, and `action`
+    a callable doing the work.
+    """
+
+    def __init__(self, name, needs, inputs, outputs, module, action):
+        self.name = name
+        self.needs = needs
+        self.inputs = inputs
+        self.outputs = outputs
+        self.module = module
+        self.action = action
+
+    def stamp(self):
+        """
+        The hashes recorded for this step; missing files hash to None.
+        """
+        def hashes(paths):
+            return {os.path.relpath(path, DB_DIR): file_hash(path) if os.path.exists(path) else None
+                    for path in paths}
+
+        return {"code": code_hash(self.module), "inputs": hashes(self.inputs), "outputs": hashes(self.outputs)}
+
+    def up_to_date(self, stamps, refresh_urls=False):
+        if not all(os.path.exists(path) for path in self.outputs):
+            return False
+        if not self.inputs:
+            # Only the urls step has no input file
+            return not refresh_urls
+        return stamps.get(self.name) == self.stamp()
+
+
+def final_outputs(profile):
+    return [final_file(profile)] + derived_outputs(profile)
+
+
+def build_steps(profiles, resources, args):
+    """
+    Return the build graph for `profiles` as {step name: Step}.
+    """
+    steps = {}
+    for profile in profiles:
+        name = profile.name
+        steps[f"{name}:urls"] = Step(
+            f"{name}:urls", [], [], [url_file(profile)], "listing",
+            lambda p=profile: run_listings([p], resources.scraper(), args.base_url))
+        raw_inputs = [url_file(profile)]
+        if args.from_archive:
+            raw_inputs.append(archive_file(profile, args.archive))
+        steps[f"{name}:raw"] = Step(
+            f"{name}:raw", [f"{name}:urls"], raw_inputs, [raw_file(profile)], "raw",
+            lambda p=profile: run_raw(p, None if args.from_archive else resources.scraper(), args.workers,
+                                      args.base_url, resources.pool(), args.resume, args.checkpoint_every,
+                                      args.fast_parse, resources.parse_pool(), args.parse_workers,
+                                      args.archive, args.from_archive))
+        steps[f"{name}:final"] = Step(
+            f"{name}:final", [f"{name}:raw"], [raw_file(profile)], final_outputs(profile), "final",
+            lambda p=profile: run_final(p, resources.store, resources.memo))
+
+    # Stat_IDs.json is only written here, not by each (parallel) final step
+    def write_manifests():
+        write_manifest()
+        write_stat_ids()
+
+    all_manifests = [category_manifest_file(profile) for profile in PROFILES.values()]
+    steps["manifest"] = Step(
+        "manifest", [f"{profile.name}:final" for profile in profiles],
+        all_manifests, [MANIFEST_FILE, STAT_IDS_FILE], "shards",
+        write_manifests)
+    return steps
+
+
+class Resources:
+    """
+    What the steps share: the item store and transform cache, and the
+    scraper, page cache and fetch and parse pools, which are only created
+    once a step needs them.
+    """
+
+    def __init__(self, args, categories):
+        self.args = args
+        self.categories = categories
+        self.lock = threading.Lock()
+        self._scraper = None
+        self._cache = None
+        self._pool = None
+        self._parse_pool = None
+        self.store = None if args.no_store else ItemStore(args.store)
+        self.memo = None if args.no_transform_cache else TransformMemo(args.transform_cache)
+
+    def scraper(self):
+        with self.lock:
+            if self._scraper is None:
+                self._scraper, self._cache = open_scraper(self.args, self.categories)
+            return self._scraper
+
+    def pool(self):
+        with self.lock:
+            if self._pool is None and self.args.workers > 1:
+                self._pool = ThreadPoolExecutor(max_workers=self.args.workers)
+            return self._pool
+
+    def parse_pool(self):
+        with self.lock:
+            if self._parse_pool is None and self.args.parse_workers > 0:
+                self._parse_pool = ProcessPoolExecutor(max_workers=self.args.parse_workers)
+            return self._parse_pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown()
+        if self._cache is not None:
+            self._cache.close()
+        if self.store is not None:
+            self.store.close()
+        if self.memo is not None:
+            self.memo.close()
+
+
+def load_stamps(path=STAMPS_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_stamps(stamps, path=STAMPS_FILE):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(stamps, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def plan(steps, stamps, args):
+    """
+    Return the names of the steps that would run: the out-of-date ones and
+    everything downstream of them.
+    """
+    stale = set()
+    for name, step in steps.items():  # dependencies come first
+        if args.force or any(need in stale for need in step.needs) or not step.up_to_date(stamps, args.refresh_urls):
+            stale.add(name)
+    return stale
+
+
+def log(message):
+    # One write per line, so lines from parallel steps don't run together
+    sys.stdout.write(message + "\n")
+
+
+def run_graph(steps, stamps, args, profiler=None):
+    """
+    Run the steps on `args.jobs` threads, each once the steps it needs are
+    done. Returns the names of the steps that failed or were not run
+    because something they need failed.
+    """
+    lock = threading.Lock()
+
+    def profiled(name):
+        return profiler.stage(name.replace(":", "-")) if profiler else nullcontext()
+
+    def execute(step):
+        if not args.force and step.up_to_date(stamps, args.refresh_urls):
+            log(f"[{step.name}] up to date")
+            return
+        log(f"[{step.name}] running")
+        category, _, stage = step.name.rpartition(":")
+        with METRICS.time("stage_seconds", stage=stage, category=category or "all"), profiled(step.name):
+            step.action()
+        stamp = step.stamp()
+        with lock:
+            stamps[step.name] = stamp
+            save_stamps(stamps)
+        log(f"[{step.name}] done")
+
+    pending = dict(steps)
+    done = set()
+    failed = set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        while pending or running:
+            for name, step in list(pending.items()):
+                if any(need in failed for need in step.needs):
+                    log(f"[{name}] skipped: a step it needs failed")
+                    failed.add(name)
+                    del pending[name]
+                elif all(need in done for need in step.needs):
+                    running[executor.submit(execute, step)] = name
+                    del pending[name]
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    future.result()
+                    done.add(name)
+                except Exception as e:
+                    log(f"[{name}] failed: {e!r}")
+                    failed.add(name)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m pipeline.build",
+                                     description="Build every out-of-date DB artifact.")
+    add_run_options(parser)
+    parser.add_argument("--jobs", type=int, default=len(PROFILES),
+                        help="steps to run at once (default: one per category)")
+    parser.add_argument("--refresh-urls", action="store_true", help="crawl the category listings again")
+    parser.add_argument("--force", action="store_true", help="run every step")
+    parser.add_argument("--dry-run", action="store_true", help="print the steps that would run")
+    args = parser.parse_args()
+    if args.from_archive and not args.archive:
+        args.archive = DEFAULT_ARCHIVE_DIR
+    if args.profile:
+        args.jobs = 1
+
+    profiles = [get_profile(name) for name in args.category]
+    stamps = load_stamps()
+    if args.dry_run:
+        steps = build_steps(profiles, None, args)
+        stale = plan(steps, stamps, args)
+        for name in steps:
+            print(f"{'run ' if name in stale else 'skip'}  {name}")
+        return
+
+    resources = Resources(args, len(profiles))
+    METRICS.slowest_count = args.slowest
+    profiler = StageProfiler(args.profile) if args.profile else None
+    try:
+        failed = run_graph(build_steps(profiles, resources, args), stamps, args, profiler)
+    finally:
+        resources.close()
+        METRICS.write(args.metrics)
+        if profiler is not None:
+            profiler.write_slowest(METRICS.slowest_pages("parse"))
+    print(f"\n{METRICS.summary()}\n\nMetrics written to '{args.metrics}'")
+    if failed:
+        raise SystemExit(f"Failed: {', '.join(sorted(failed))}")
+
+
+if __name__ == "__main__":
+    main()
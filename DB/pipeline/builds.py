@@ -0,0 +1,112 @@
+"""
+Evaluate a file of builds with the stat engine.
+
+    python -m pipeline.builds builds.jsonl -o totals.jsonl
+
+Each input line is one build:
+
+    {"id": "Ana, fire 170",
+     "gear": {"Hats": "...", "Amulet": "...", "Rings": "..."},
+     "jewels": ["...", "..."],
+     "pets": [{"type": "damage", "value": 5, "school": "fire"}, ["health", 100]]}
+
+Gear slots are category names (case-insensitive, singular accepted); pet
+talents are objects or [type, value, school] lists. Each output line holds
+the build's "id" (or its line number) and either "stats", the totals as
+keyed by StatEngine.totals_dict(), or an "error". Builds are read and
+written one at a time, so memory stays flat however long the file is; the
+throughput is reported on stderr.
+"""
+import argparse
+import json
+import sys
+import time
+
+from pipeline.engine import StatEngine
+from pipeline.profiles import get_profile
+from pipeline.query import GearDB
+
+PROGRESS_EVERY = 100000
+
+
+def resolve_slot(slot, cache):
+    """
+    Return the category name of a gear slot ("amulet" -> "Amulets").
+    """
+    if slot not in cache:
+        try:
+            cache[slot] = get_profile(slot).name
+        except KeyError:
+            cache[slot] = get_profile(slot + "s").name
+    return cache[slot]
+
+
+def parse_pet(pet):
+    if isinstance(pet, dict):
+        return pet.get("type") or "", float(pet.get("value", 0)), pet.get("school")
+    talent_type, value, *school = pet
+    return talent_type, float(value), school[0] if school else None
+
+
+def evaluate_build(engine, build, slots):
+    gear = {resolve_slot(slot, slots): name for slot, name in (build.get("gear") or {}).items()}
+    pets = [parse_pet(pet) for pet in build.get("pets") or []]
+    return engine.totals_dict(engine.evaluate(gear, build.get("jewels") or [], pets))
+
+
+def run(engine, lines, out):
+    """
+    Evaluate every build in `lines`, writing one result line each to `out`.
+    Returns (builds, errors).
+    """
+    slots = {}
+    count = errors = 0
+    start = time.perf_counter()
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        count += 1
+        build_id = number
+        try:
+            build = json.loads(line)
+            if isinstance(build, dict) and build.get("id") is not None:
+                build_id = build["id"]
+            result = {"id": build_id, "stats": evaluate_build(engine, build, slots)}
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            errors += 1
+            # KeyError's str() quotes its message
+            result = {"id": build_id, "error": str(e.args[0]) if isinstance(e, KeyError) and e.args else str(e)}
+        out.write(json.dumps(result, ensure_ascii=False, separators=(",", ":")) + "\n")
+        if count % PROGRESS_EVERY == 0:
+            elapsed = time.perf_counter() - start
+            print(f"{count:,} builds, {count / elapsed:,.0f} builds/s", file=sys.stderr)
+    return count, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a JSON Lines file of builds.")
+    parser.add_argument("builds", help="JSON Lines file of builds ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output JSON Lines file (default: stdout)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    engine = StatEngine(GearDB.load())
+    loaded = time.perf_counter() - start
+    source = sys.stdin if args.builds == "-" else open(args.builds, "r", encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        start = time.perf_counter()
+        count, errors = run(engine, source, out)
+        elapsed = time.perf_counter() - start
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    print(f"Evaluated {count:,} builds ({errors:,} with errors) in {elapsed:.2f}s "
+          f"({count / elapsed if elapsed else 0:,.0f} builds/s); datasets loaded in {loaded:.2f}s",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
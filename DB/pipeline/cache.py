@@ -0,0 +1,136 @@
+"""
+Persistent HTTP response cache for wiki pages.
+
+Pages are stored in a single SQLite file keyed by URL, with the body
+(zlib-compressed), ETag, Last-Modified and fetch time. A cached page
+younger than the TTL is served without any request; an older one is
+revalidated with a conditional GET, so an unchanged page costs a 304
+instead of a full download. When the cache grows past its size limit the
+least recently used pages are evicted.
+"""
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+from pipeline.metrics import METRICS
+
+# Default cache location, relative to the DB folder
+DEFAULT_CACHE_FILE = ".http_cache.sqlite"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# What CachingScraper.get() returns; `from_cache` is "fresh" (no request),
+# "revalidated" (304) or None (downloaded).
+CachedResponse = namedtuple("CachedResponse", ["url", "status_code", "text", "from_cache"])
+
+
+class PageCache:
+    """
+    SQLite-backed page store, safe to share between fetch threads.
+    """
+
+    def __init__(self, path, ttl=0, max_bytes=DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, body BLOB, etag TEXT, last_modified TEXT,"
+            " fetched_at REAL, used_at REAL, size INTEGER)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_used_at ON pages (used_at)")
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def get(self, url):
+        """
+        Return (text, etag, last_modified, fetched_at) for `url`, or None.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE pages SET used_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+        body, etag, last_modified, fetched_at = row
+        return zlib.decompress(body).decode("utf-8"), etag, last_modified, fetched_at
+
+    def put(self, url, text, etag=None, last_modified=None):
+        """
+        Store a freshly downloaded page, evicting old pages if over the size limit.
+        """
+        body = zlib.compress(text.encode("utf-8"))
+        now = time.time()
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM pages WHERE url = ?", (url,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, now, now, len(body)),
+            )
+            self.total_bytes += len(body) - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self.conn.commit()
+
+    def touch(self, url):
+        """
+        Mark a page as revalidated (304) now, restarting its TTL.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("UPDATE pages SET fetched_at = ?, used_at = ? WHERE url = ?", (now, now, url))
+            self.conn.commit()
+
+    def _evict(self):
+        # Drop least recently used pages until the cache is back under 90% of its limit
+        target = self.max_bytes * 0.9
+        rows = self.conn.execute("SELECT url, size FROM pages ORDER BY used_at").fetchall()
+        for url, size in rows:
+            if self.total_bytes <= target:
+                break
+            self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self.total_bytes -= size
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class CachingScraper:
+    """
+    Wraps a cloudscraper session so that get() goes through a PageCache.
+
+    Only 200 responses are stored; anything else is passed through uncached.
+    """
+
+    def __init__(self, scraper, cache):
+        self.scraper = scraper
+        self.cache = cache
+
+    def get(self, url):
+        cached = self.cache.get(url)
+        headers = {}
+        if cached is not None:
+            text, etag, last_modified, fetched_at = cached
+            if time.time() - fetched_at < self.cache.ttl:
+                METRICS.count("cache_requests", result="fresh")
+                return CachedResponse(url, 200, text, "fresh")
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        response = self.scraper.get(url, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(url)
+            METRICS.count("cache_requests", result="revalidated")
+            return CachedResponse(url, 200, cached[0], "revalidated")
+        METRICS.count("cache_requests", result="miss")
+        if response.status_code == 200:
+            self.cache.put(url, response.text, response.headers.get("ETag"),
+                           response.headers.get("Last-Modified"))
+        return CachedResponse(url, response.status_code, response.text, None)
@@ -0,0 +1,169 @@
+"""
+Incremental refresh driven by the wiki's recent changes.
+
+Instead of re-crawling every category listing and item page, take the
+list of page titles changed since the last refresh, fetch only those
+pages, and patch RAW_<Category>_Data.json and <Category>_Data.json in
+place by URL (and the item store, if one is given). Titles come from the
+MediaWiki recentchanges API or from a local JSON file (a list of titles,
+a list of {"title": ...} objects, or a saved API response) for dry runs
+and stand-in testing.
+
+Changed titles that are not in any <Category>_URL.json yet are new pages:
+they are fetched once and filed under the category whose
+"Category:<Name>" link appears on the page.
+"""
+import json
+import os
+from urllib.parse import quote
+
+from pipeline.compact import write_compact
+from pipeline.fetch import fetch_pages, rebase_url
+from pipeline.final import timed_transform_item
+from pipeline.frontier import write_frontier
+from pipeline.jsonio import dump_array
+from pipeline.listing import BASE_URL
+from pipeline.matrix import write_matrix
+from pipeline.metrics import METRICS
+from pipeline.profiles import final_file, raw_file, url_file
+from pipeline.raw import pending_items, timed_extract_item
+from pipeline.shards import write_shards
+
+API_URL = BASE_URL + "/wiki/api.php"
+
+
+def load_changes_file(path):
+    """
+    Read changed page titles from a JSON file, preserving order and dropping duplicates.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("query", {}).get("recentchanges", [])
+    titles = [entry["title"] if isinstance(entry, dict) else entry for entry in data]
+    return list(dict.fromkeys(titles))
+
+
+def fetch_recent_changes(scraper, since, api_url=API_URL, base_url=None):
+    """
+    Return the titles of pages edited or created on the wiki since `since`
+    (an ISO 8601 timestamp such as "2025-05-01T00:00:00Z").
+    """
+    params = {
+        "action": "query",
+        "list": "recentchanges",
+        "rcend": since,
+        "rcprop": "title",
+        "rctype": "edit|new",
+        "rclimit": "500",
+        "format": "json",
+    }
+    titles = []
+    while True:
+        query = "&".join(f"{key}={quote(value, safe='')}" for key, value in params.items())
+        print("Fetching recent changes:", api_url)
+        response = scraper.get(rebase_url(f"{api_url}?{query}", base_url))
+        data = json.loads(response.text)
+        titles.extend(change["title"] for change in data.get("query", {}).get("recentchanges", []))
+        if "continue" not in data:
+            break
+        params.update(data["continue"])
+    return list(dict.fromkeys(titles))
+
+
+def title_url(title):
+    """
+    Build the wiki URL of a page title, encoded like the category listings.
+    """
+    return BASE_URL + "/wiki/" + quote(title.replace(" ", "_"), safe=";@$!*(),/:~")
+
+
+def patch_file(path, records):
+    """
+    Replace the entries of the JSON array in `path` that share a URL with
+    one of `records`, append the rest, and rewrite the file (through a
+    temporary file, so an interrupted update leaves the old one). Returns
+    the patched list.
+    """
+    data = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    positions = {entry.get("url"): i for i, entry in enumerate(data)}
+    for record in records:
+        if record["url"] in positions:
+            data[positions[record["url"]]] = record
+        else:
+            positions[record["url"]] = len(data)
+            data.append(record)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        dump_array(data, f)
+    os.replace(path + ".tmp", path)
+    return data
+
+
+def run_update(profiles, scraper, titles, workers, base_url=None, pool=None, fast=False, store=None):
+    """
+    Refresh only the items whose page titles are in `titles`.
+    """
+    changed = set(titles)
+
+    # Find the changed titles in each category's URL list
+    targets = []  # (profile, item_title, item_url, listing_title); profile is None for new pages
+    known_titles = set()
+    for profile in profiles:
+        if not os.path.exists(url_file(profile)):
+            continue
+        with open(url_file(profile), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        for entry in entries:
+            known_titles.add(entry.get("title"))
+        matching = [entry for entry in entries if entry.get("title") in changed]
+        for item_title, item_url in pending_items(matching):
+            targets.append((profile, item_title, item_url, None))
+
+    # Titles no listing knows about may be new items; their category is decided once fetched
+    for title in titles:
+        if title not in known_titles and title.split(":", 1)[0] in ("Item", "Jewel"):
+            item_title = title[len("Item:"):].strip() if title.startswith("Item:") else title
+            targets.append((None, item_title, title_url(title), title))
+
+    print(f"{len(titles)} changed titles, {len(targets)} item pages to refresh.")
+    if not targets:
+        return
+
+    updates = {profile.name: {"raw": [], "final": [], "new": []} for profile in profiles}
+    pages = fetch_pages(scraper, [target[2] for target in targets], workers, base_url, pool)
+    for (profile, item_title, item_url, listing_title), (_, html) in zip(targets, pages):
+        print(f"\nFetched item page: {item_url}")
+        if profile is None:
+            # A new page: file it under the category it links to, if any
+            for candidate in profiles:
+                if f'href="{candidate.listing_page}"' in html:
+                    profile = candidate
+                    updates[profile.name]["new"].append({"title": listing_title, "url": item_url})
+                    break
+            else:
+                print(f"Skipping '{item_title}': not in any known category.")
+                continue
+        record, seconds = timed_extract_item(html, item_url, item_title, profile, fast)
+        METRICS.page("parse", item_url, seconds)
+        updates[profile.name]["raw"].append(record)
+        updates[profile.name]["final"].append(timed_transform_item(record, profile))
+
+    for profile in profiles:
+        update = updates[profile.name]
+        if not update["raw"]:
+            continue
+        if os.path.exists(raw_file(profile)):
+            patch_file(raw_file(profile), update["raw"])
+        final_items = patch_file(final_file(profile), update["final"])
+        write_matrix(profile, final_items)
+        write_frontier(profile, final_items)
+        write_shards(profile, final_items)
+        write_compact(profile, final_items)
+        if store is not None:
+            store.update_items(profile, update["final"])
+        if update["new"]:
+            patch_file(url_file(profile), update["new"])
+        print(f"Updated {len(update['final'])} items ({len(update['new'])} new) in '{final_file(profile)}'")
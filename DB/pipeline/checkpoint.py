@@ -0,0 +1,91 @@
+"""
+Append-only checkpoint journal for the RAW stage.
+
+Each extracted item is appended to a JSON Lines journal as soon as it is
+parsed and the file is flushed to disk every few items, so a crash or a
+Cloudflare block loses at most one batch. A resumed run skips every URL
+already in the journal. At the end the journal is compacted into the
+usual RAW_<Category>_Data.json, streaming record by record so the full
+result list never has to sit in memory.
+"""
+import json
+import os
+
+from pipeline.jsonio import dump_array
+
+DEFAULT_FLUSH_EVERY = 50
+
+
+class Journal:
+    """
+    JSON Lines journal of RAW records, one line per item URL.
+    """
+
+    def __init__(self, path, resume=False, flush_every=DEFAULT_FLUSH_EVERY):
+        self.path = path
+        self.flush_every = flush_every
+        self.done_urls = set()
+        self.unflushed = 0
+        if resume and os.path.exists(path):
+            self._recover()
+            self.file = open(path, "a", encoding="utf-8")
+        else:
+            self.file = open(path, "w", encoding="utf-8")
+
+    def _recover(self):
+        # Collect the URLs already journalled and cut off a partly written last line
+        good_size = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.done_urls.add(record["url"])
+                good_size += len(line)
+        with open(self.path, "r+b") as f:
+            f.truncate(good_size)
+
+    def append(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.done_urls.add(record["url"])
+        self.unflushed += 1
+        if self.unflushed >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unflushed = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def compact(self, urls, output_filename):
+        """
+        Write the journalled records for `urls`, in that order, to
+        `output_filename` as an indented JSON array, then delete the journal.
+        Only line offsets are kept in memory; records are re-read one at a time.
+        """
+        offsets = {}
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                offsets[json.loads(line)["url"]] = offset
+                offset += len(line)
+
+        with open(self.path, "rb") as f:
+            def records():
+                for url in urls:
+                    if url in offsets:
+                        f.seek(offsets[url])
+                        yield json.loads(f.readline())
+
+            tmp_filename = output_filename + ".tmp"
+            with open(tmp_filename, "w", encoding="utf-8") as outf:
+                dump_array(records(), outf)
+        os.replace(tmp_filename, output_filename)
+        os.remove(self.path)
@@ -0,0 +1,199 @@
+"""
+Command line entry point for the extraction pipeline.
+
+Runs any of the URL, RAW and Final stages for any set of categories in one
+process, sharing one cloudscraper session and one fetch worker pool:
+
+    python -m pipeline                          # all stages, all categories
+    python -m pipeline raw final -c Wands Jewels --workers 16
+    python -m pipeline update --changes-since 2025-05-01T00:00:00Z
+
+Run from the DB folder (or anywhere with DB on the import path); input and
+output paths are resolved relative to DB, not the working directory.
+Every run ends with a summary of its metrics (see pipeline.metrics).
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+
+from pipeline.archive import DEFAULT_ARCHIVE_DIR
+from pipeline.cache import DEFAULT_CACHE_FILE, DEFAULT_MAX_BYTES, CachingScraper, PageCache
+from pipeline.changes import fetch_recent_changes, load_changes_file, run_update
+from pipeline.checkpoint import DEFAULT_FLUSH_EVERY
+from pipeline.fetch import DEFAULT_WORKERS, create_scraper
+from pipeline.final import run_final
+from pipeline.listing import run_listings
+from pipeline.memo import DEFAULT_MEMO_FILE, TransformMemo
+from pipeline.metrics import DEFAULT_METRICS_FILE, METRICS, SLOWEST
+from pipeline.profiles import DB_DIR, PROFILES, get_profile
+from pipeline.profiling import DEFAULT_PROFILE_DIR, StageProfiler
+from pipeline.raw import run_raw
+from pipeline.scheduler import DEFAULT_MAX_RETRIES, DEFAULT_RATE, DEFAULT_TIMEOUT, RequestScheduler
+from pipeline.stats import write_stat_ids
+from pipeline.store import DEFAULT_STORE_FILE, ItemStore
+
+STAGES = ["urls", "raw", "final"]
+# "update" patches existing outputs from a change list instead of running the stages
+UPDATE = "update"
+
+
+def add_run_options(parser):
+    """
+    Add the options for fetching, parsing and storing pages, which
+    pipeline.build takes as well.
+    """
+    parser.add_argument("-c", "--category", nargs="+", default=list(PROFILES),
+                        help="categories to process (default: all)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="number of concurrent page requests (1 = serial)")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="parse pages on this many processes (default: parse inline)")
+    parser.add_argument("--base-url", help="fetch pages from this host instead, e.g. a local stand-in")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help=f"maximum requests per second (0 = unlimited, default: {DEFAULT_RATE:g})")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES,
+                        help="retry a page this many times on 429/5xx, connection errors or timeouts")
+    parser.add_argument("--connect-timeout", type=float, default=DEFAULT_TIMEOUT[0],
+                        help=f"seconds to wait for a connection (default: {DEFAULT_TIMEOUT[0]:g})")
+    parser.add_argument("--read-timeout", type=float, default=DEFAULT_TIMEOUT[1],
+                        help=f"seconds to wait for the server to send data (default: {DEFAULT_TIMEOUT[1]:g})")
+    parser.add_argument("--cache", default=os.path.join(DB_DIR, DEFAULT_CACHE_FILE),
+                        help=f"page cache file (default: DB/{DEFAULT_CACHE_FILE})")
+    parser.add_argument("--no-cache", action="store_true", help="always download pages")
+    parser.add_argument("--cache-ttl", type=float, default=0,
+                        help="seconds a cached page is used without revalidating (default: always revalidate)")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / 1024 ** 2,
+                        help="evict least recently used pages beyond this size")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted RAW run from its checkpoint journal")
+    parser.add_argument("--checkpoint-every", type=int, default=DEFAULT_FLUSH_EVERY,
+                        help="flush the RAW checkpoint journal to disk every N items")
+    parser.add_argument("--archive", nargs="?", const=DEFAULT_ARCHIVE_DIR,
+                        help="store fetched item pages in per-category archives in this folder (default: DB/.archive)")
+    parser.add_argument("--from-archive", action="store_true",
+                        help="RAW: parse pages from the archives instead of fetching them")
+    parser.add_argument("--fast-parse", action="store_true",
+                        help="build only the infobox/category elements of each page (see pipeline.parsebench)")
+    parser.add_argument("--store", default=DEFAULT_STORE_FILE,
+                        help="SQLite item database the Final stage loads its output into (default: DB/items.sqlite)")
+    parser.add_argument("--no-store", action="store_true", help="only write the JSON files")
+    parser.add_argument("--transform-cache", default=DEFAULT_MEMO_FILE,
+                        help="Final: reuse transformed items from this file (default: DB/.transform_cache.sqlite)")
+    parser.add_argument("--no-transform-cache", action="store_true", help="Final: transform every item")
+    parser.add_argument("--metrics", default=DEFAULT_METRICS_FILE,
+                        help="write run metrics here, and as Prometheus text next to it "
+                             "(default: DB/pipeline_metrics.json)")
+    parser.add_argument("--slowest", type=int, default=SLOWEST,
+                        help=f"list this many of the slowest pages to fetch and parse (default: {SLOWEST})")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_DIR,
+                        help="profile each stage into this folder (default: DB/.profile), see pipeline.profiling")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m pipeline",
+                                     description="Build the gear DB from the wiki.")
+    parser.add_argument("stages", nargs="*", choices=STAGES + [UPDATE],
+                        help="stages to run, in order (default: all), or 'update' for an incremental refresh")
+    add_run_options(parser)
+    parser.add_argument("--changes", help="update: JSON file of changed page titles")
+    parser.add_argument("--changes-since",
+                        help="update: ask the wiki for pages changed since this ISO 8601 timestamp")
+    return parser
+
+
+def open_scraper(args, categories):
+    """
+    Return (scraper, page cache or None) for a run over `categories`
+    categories: one session sized for every category's listing chain to
+    run at once, rate limited and retried by a RequestScheduler, and
+    answered from the page cache first unless --no-cache is given.
+    Cache hits are answered before the scheduler, so they are not rate limited.
+    """
+    session_size = max(args.workers, categories)
+    scraper = RequestScheduler(create_scraper(session_size), session_size, args.rate, args.max_retries,
+                               timeout=(args.connect_timeout, args.read_timeout))
+    cache = None
+    if not args.no_cache:
+        cache = PageCache(args.cache, args.cache_ttl, args.cache_max_mb * 1024 ** 2)
+        scraper = CachingScraper(scraper, cache)
+    return scraper, cache
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if UPDATE in args.stages:
+        if len(args.stages) > 1 or not (args.changes or args.changes_since):
+            parser.error("'update' runs on its own and needs --changes or --changes-since")
+        stages = [UPDATE]
+    else:
+        stages = [stage for stage in STAGES if stage in args.stages] if args.stages else STAGES
+    profiles = [get_profile(name) for name in args.category]
+    if args.from_archive and not args.archive:
+        args.archive = DEFAULT_ARCHIVE_DIR
+
+    scraper = None
+    cache = None
+    pool = None
+    parse_pool = None
+    needs_network = UPDATE in stages or "urls" in stages or ("raw" in stages and not args.from_archive)
+    if needs_network:
+        # One session and one worker pool for every category
+        scraper, cache = open_scraper(args, len(profiles))
+        if args.workers > 1:
+            pool = ThreadPoolExecutor(max_workers=args.workers)
+    if args.parse_workers > 0 and "raw" in stages:
+        parse_pool = ProcessPoolExecutor(max_workers=args.parse_workers)
+    store = None
+    if not args.no_store and (UPDATE in stages or "final" in stages):
+        store = ItemStore(args.store)
+    memo = None
+    if not args.no_transform_cache and "final" in stages:
+        memo = TransformMemo(args.transform_cache)
+    METRICS.slowest_count = args.slowest
+    profiler = StageProfiler(args.profile) if args.profile else None
+
+    def profiled(name):
+        return profiler.stage(name) if profiler else nullcontext()
+
+    try:
+        if UPDATE in stages:
+            if args.changes:
+                titles = load_changes_file(args.changes)
+            else:
+                titles = fetch_recent_changes(scraper, args.changes_since, base_url=args.base_url)
+            with METRICS.time("stage_seconds", stage=UPDATE), profiled(UPDATE):
+                run_update(profiles, scraper, titles, args.workers, args.base_url, pool, args.fast_parse, store)
+            return
+        if "urls" in stages:
+            with METRICS.time("stage_seconds", stage="urls"), profiled("urls"):
+                run_listings(profiles, scraper, args.base_url)
+        for profile in profiles:
+            if "raw" in stages:
+                with METRICS.time("stage_seconds", stage="raw", category=profile.name), \
+                        profiled(f"raw-{profile.name}"):
+                    run_raw(profile, scraper, args.workers, args.base_url, pool,
+                            args.resume, args.checkpoint_every, args.fast_parse,
+                            parse_pool, args.parse_workers, args.archive, args.from_archive)
+            if "final" in stages:
+                with METRICS.time("stage_seconds", stage="final", category=profile.name), \
+                        profiled(f"final-{profile.name}"):
+                    run_final(profile, store, memo)
+        if "final" in stages:
+            write_stat_ids()
+    finally:
+        METRICS.write(args.metrics)
+        print(f"\n{METRICS.summary()}\n\nMetrics written to '{args.metrics}'")
+        if profiler is not None:
+            profiler.write_slowest(METRICS.slowest_pages("parse"))
+        if pool is not None:
+            pool.shutdown()
+        if parse_pool is not None:
+            parse_pool.shutdown()
+        if store is not None:
+            store.close()
+        if memo is not None:
+            memo.close()
+        if cache is not None:
+            cache.close()
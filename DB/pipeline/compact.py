@@ -0,0 +1,136 @@
+"""
+Minified, precompressed copies of the Final files.
+
+Next to <Category>_Data.json (indented, full field names) the Final stage
+writes:
+
+    <Category>_Data.min.json      {"keys": {"n": "Name", ...}, "items": [...]}
+    <Category>_Data.min.json.gz   gzip of the above
+    <Category>_Data.min.json.br   brotli of the above, if the brotli module
+                                  is installed
+
+The items are the Final items without whitespace and with the top-level
+fields renamed by SHORT_KEYS; "keys" maps them back, so a reader needs no
+other file (see load_compact). Bonus names are left as they are.
+
+    python -m pipeline.compact            # rebuild for every category, print sizes
+    python -m pipeline.compact Amulets
+"""
+import argparse
+import gzip
+import json
+import os
+
+from pipeline.profiles import PROFILES, final_file, get_profile
+
+SHORT_KEYS = {
+    "Name": "n",
+    "url": "u",
+    "level": "l",
+    "tradeable": "t",
+    "no_auction": "a",
+    "status": "s",
+    "School Type": "c",
+    "sockets": "k",
+    "type": "y",
+    "school": "h",
+    "weaving_school": "w",
+    "bonuses": "b",
+    "stats": "x",
+}
+LONG_KEYS = {short: name for name, short in SHORT_KEYS.items()}
+
+
+def compact_file(profile):
+    return final_file(profile)[:-len(".json")] + ".min.json"
+
+
+def shorten(item):
+    return {SHORT_KEYS.get(key, key): value for key, value in item.items()}
+
+
+def brotli_compressor():
+    """
+    Return a streaming brotli compressor, or None without the brotli module.
+    """
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.Compressor(quality=11)
+
+
+def write_compact(profile, items):
+    """
+    Write the minified file and its compressed siblings for a category's
+    Final items, which may be any iterable. Returns {file: size in bytes}
+    of what was written.
+    """
+    path = compact_file(profile)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"keys":' + json.dumps(LONG_KEYS, separators=(",", ":")) + ',"items":[')
+        for i, item in enumerate(items):
+            f.write(("," if i else "") + json.dumps(shorten(item), ensure_ascii=False, separators=(",", ":")))
+        f.write("]}")
+
+    compressor = brotli_compressor()
+    if compressor is None and os.path.exists(path + ".br"):
+        # A stale .br would no longer match the .min.json
+        os.remove(path + ".br")
+    with open(path, "rb") as source, open(path + ".gz", "wb") as gz_file:
+        br_file = open(path + ".br", "wb") if compressor is not None else None
+        with gzip.GzipFile(filename="", mode="wb", fileobj=gz_file, compresslevel=9, mtime=0) as gz:
+            for block in iter(lambda: source.read(1 << 20), b""):
+                gz.write(block)
+                if br_file:
+                    br_file.write(compressor.process(block))
+        if br_file:
+            br_file.write(compressor.finish())
+            br_file.close()
+    files = [path, path + ".gz"] + ([path + ".br"] if compressor is not None else [])
+    return {file: os.path.getsize(file) for file in files}
+
+
+def load_compact(profile):
+    """
+    Read a category's minified file back into Final items.
+    """
+    with open(compact_file(profile), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    long_keys = data["keys"]
+    return [{long_keys.get(key, key): value for key, value in item.items()} for item in data["items"]]
+
+
+def size_report(profile, sizes):
+    """
+    One line comparing the written sizes with the indented Final file.
+    """
+    path = compact_file(profile)
+    full = os.path.getsize(final_file(profile))
+    columns = [f"json {full / 1024:,.0f} KB"]
+    for label, file in (("min", path), ("gz", path + ".gz"), ("br", path + ".br")):
+        if file in sizes:
+            columns.append(f"{label} {sizes[file] / 1024:,.0f} KB ({sizes[file] / full:.1%})")
+        else:
+            columns.append(f"{label} -")
+    return f"{profile.name:<8} " + "  ".join(columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write minified and precompressed Final files.")
+    parser.add_argument("categories", nargs="*", help="categories to rebuild (default: all with Final data)")
+    args = parser.parse_args()
+
+    profiles = [get_profile(name) for name in args.categories] if args.categories else PROFILES.values()
+    for profile in profiles:
+        if not os.path.exists(final_file(profile)):
+            continue
+        with open(final_file(profile), "r", encoding="utf-8") as f:
+            items = json.load(f)
+        print(size_report(profile, write_compact(profile, items)))
+    if brotli_compressor() is None:
+        print("brotli is not installed; no .br files were written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Stat totals of a build, computed as the calculator's calculateFinalStats does.
+
+Instead of one branch per bonus name, each item is turned once into its
+stat matrix row (see pipeline.matrix), kept as (column, value) pairs, and
+a build's totals are the sum of its rows plus its pet talents:
+
+    engine = StatEngine(GearDB.load())
+    totals = engine.evaluate({"Amulets": "Uber Candymancer Rope", "Rings": "..."},
+                             jewels=["Unearthly Damage Ruby +10% (Fire)"] * 3,
+                             pet_talents=[("damage", 5, "fire"), ("health", 100, None)])
+    engine.totals_dict(totals)["Damage"]["fire"]
+
+The result is keyed like the calculator's "Aggregated ..." values: the
+school stats of SCHOOL_TOTALS map to {school: value} for each school of
+pipeline.matrix.MATRIX_SCHOOLS (lower-case), the rest of SCALAR_TOTALS to
+a number. Items are looked up by name, first match, as the calculator
+does. pipeline.engineparity checks the totals against Script.js itself.
+"""
+import functools
+
+from pipeline.matrix import COLUMN_INDEX, COLUMNS, MATRIX_SCHOOLS, SCHOOL_STATS, item_columns
+
+SCHOOL_TOTALS = SCHOOL_STATS
+SCALAR_TOTALS = ("Stun Resistance", "Incoming Healing", "Outgoing Healing", "Power Pip",
+                 "Shadow Pip", "Archmastery", "Health", "Mana", "Energy")
+
+# Where each total sits in pipeline.matrix.COLUMNS
+SCHOOL_LAYOUT = [(stat, [(school.lower(), COLUMN_INDEX[f"{stat}:{school}"]) for school in MATRIX_SCHOOLS])
+                 for stat in SCHOOL_TOTALS]
+SCALAR_LAYOUT = [(stat, COLUMN_INDEX[stat]) for stat in SCALAR_TOTALS]
+
+# The calculator's pet talent types and the stat each one adds to
+PET_TALENTS = {
+    "damage": "Damage",
+    "resistance": "Resistance",
+    "accuracy": "Accuracy",
+    "critical rating": "Critical",
+    "critical block rating": "Critical Block",
+    "armor piercing": "Armor Piercing",
+    "pip conversion": "Pip Conversion",
+    "stun resistance": "Stun Resistance",
+    "incoming healing": "Incoming Healing",
+    "outgoing healing": "Outgoing Healing",
+    "power pips": "Power Pip",
+    "shadow pip bonus": "Shadow Pip",
+    "archmastery": "Archmastery",
+    "health": "Health",
+    "mana": "Mana",
+    "energy": "Energy",
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def pet_talent_columns(talent_type, value, school=None):
+    """
+    Return [(column, value)] for one pet talent. A school talent adds to
+    `school` only, or to every school when `school` is empty or "global";
+    unrecognized types add nothing, as in the calculator. A school that is
+    none of MATRIX_SCHOOLS raises ValueError.
+    """
+    stat = PET_TALENTS.get(talent_type.lower().strip())
+    if stat is None:
+        return []
+    if stat not in SCHOOL_TOTALS:
+        return [(COLUMN_INDEX[stat], value)]
+    if school and school.lower() != "global":
+        column = COLUMN_INDEX.get(f"{stat}:{school.strip().capitalize()}")
+        if column is None:
+            raise ValueError(f"Unknown school '{school}' for the {talent_type} pet talent "
+                             f"(expected one of {', '.join(MATRIX_SCHOOLS)} or global)")
+        return [(column, value)]
+    return [(COLUMN_INDEX[f"{stat}:{s}"], value) for s in MATRIX_SCHOOLS]
+
+
+class StatEngine:
+    """
+    Build evaluator over a GearDB, caching each item's sparse stat row.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        # (category, name) -> position of the first item with that name
+        self.positions = {}
+        for category, index in db.indexes.items():
+            for position, name in enumerate(index.names):
+                self.positions.setdefault((category, name), position)
+        self.rows = {}  # (category, name) -> [(column, value)]
+
+    def item_row(self, category, name):
+        key = (category, name)
+        row = self.rows.get(key)
+        if row is None:
+            if key not in self.positions:
+                raise KeyError(f"No {category} item named '{name}'")
+            row = sorted(item_columns(self.db.index(category).items[self.positions[key]]).items())
+            self.rows[key] = row
+        return row
+
+    def evaluate(self, gear, jewels=(), pet_talents=()):
+        """
+        Return the totals of a build as a list over pipeline.matrix.COLUMNS.
+        `gear` is {category: item name}, `jewels` jewel names and
+        `pet_talents` (talent type, value, school or None) tuples.
+        """
+        totals = [0.0] * len(COLUMNS)
+        rows = [self.item_row(category, name) for category, name in gear.items() if name]
+        rows += [self.item_row("Jewels", name) for name in jewels if name]
+        rows += [pet_talent_columns(*talent) for talent in pet_talents]
+        for row in rows:
+            for column, value in row:
+                totals[column] += value
+        return totals
+
+    @staticmethod
+    def totals_dict(totals):
+        """
+        Key a totals list like the calculator's aggregated values.
+        """
+        result = {}
+        for stat, columns in SCHOOL_LAYOUT:
+            result[stat] = {school: totals[column] for school, column in columns}
+        for stat, column in SCALAR_LAYOUT:
+            result[stat] = totals[column]
+        return result
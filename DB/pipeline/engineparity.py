@@ -0,0 +1,210 @@
+"""
+Check pipeline.engine against the calculator's own calculateFinalStats.
+
+    python -m pipeline.engineparity
+    python -m pipeline.engineparity --builds 2000 --seed 7
+
+Draws random builds (gear from every loaded category, jewels and pet
+talents), totals them with StatEngine, and runs the calculateFinalStats()
+function cut out of Script.js under Node.js, with just enough of jQuery
+stubbed in to feed it the same selections and catch its "Aggregated ..."
+log lines. Prints any build whose totals differ, then the engine's
+throughput. Without a `node` executable only the throughput is measured.
+
+    python -m pipeline.engineparity --builds 40 --write-cases
+
+writes the builds, the items they use and Script.js's totals to
+DB/tests/engine_cases.json, which the tests check StatEngine against
+without Node.js. Rerun it when calculateFinalStats changes.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import time
+
+from pipeline.engine import PET_TALENTS, SCALAR_TOTALS, SCHOOL_TOTALS, StatEngine
+from pipeline.optimize import GEAR_SLOTS, JEWELS
+from pipeline.profiles import DB_DIR
+from pipeline.query import GearDB
+
+SCRIPT_FILE = os.path.join(os.path.dirname(DB_DIR), "Script.js")
+CASES_FILE = os.path.join(DB_DIR, "tests", "engine_cases.json")
+# Script.js names the amulet slot in the singular
+JS_CATEGORIES = {"Amulets": "Amulet"}
+PET_SCHOOLS = [None, "global", "fire", "ice", "storm", "myth", "life", "death", "balance", "shadow"]
+
+HARNESS = """
+const input = JSON.parse(require("fs").readFileSync(0, "utf8"));
+const categoryDataCache = input.data;
+let build = null;
+let logged = null;
+
+const chain = { find: () => chain, first: () => chain, eq: () => chain, children: () => chain,
+                each: () => chain, text: () => chain };
+function $(selector) {
+  if (selector && selector.jewel !== undefined) return { val: () => selector.jewel };
+  if (selector === ".jewel-select") {
+    return { each: (fn) => build.jewels.forEach((name, i) => fn.call({ jewel: name }, i)) };
+  }
+  let pet = /^#pet-talent(\\d)(-type)?$/.exec(selector);
+  if (pet) {
+    let talent = build.pets[Number(pet[1]) - 1];
+    if (!pet[2]) return { val: () => (talent ? String(talent.value) : "") };
+    let school = { length: talent && talent.school ? 1 : 0, val: () => talent.school };
+    return { val: () => (talent ? talent.type : ""), siblings: () => ({ find: () => school }) };
+  }
+  for (let category in gearCategories) {
+    if (gearCategories[category] === selector) return { val: () => build.gear[category] || null };
+  }
+  return chain;
+}
+$.each = function (obj, fn) { for (let key in obj) fn.call(obj[key], key, obj[key]); };
+console.log = (label, value) => { logged[label.replace(/^Aggregated | \\(percent\\)|:$/g, "")] = value; };
+console.warn = () => {};
+
+%s
+
+%s
+
+const results = input.builds.map((b) => {
+  build = b;
+  logged = {};
+  calculateFinalStats();
+  return logged;
+});
+process.stdout.write(JSON.stringify(results));
+"""
+
+
+def js_block(source, start):
+    """
+    Return the text of Script.js from `start` to the brace closing its first "{".
+    """
+    begin = source.index(start)
+    depth = 0
+    for i in range(source.index("{", begin), len(source)):
+        if source[i] == "{":
+            depth += 1
+        elif source[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return source[begin:i + 1]
+    raise ValueError(f"Unbalanced braces after '{start}' in {SCRIPT_FILE}")
+
+
+def random_builds(db, count, rng):
+    gear_slots = [slot for slot in GEAR_SLOTS if slot in db.indexes]
+    jewel_names = db.index(JEWELS).names if JEWELS in db.indexes else []
+    builds = []
+    for _ in range(count):
+        gear = {slot: rng.choice(db.index(slot).names + [None]) for slot in gear_slots}
+        jewels = [rng.choice(jewel_names) for _ in range(rng.randint(0, 6))] if jewel_names else []
+        pets = [(rng.choice(list(PET_TALENTS) + ["unknown"]), rng.choice([1, 2, 5, 7.5, 100]),
+                 rng.choice(PET_SCHOOLS)) for _ in range(rng.randint(0, 5))]
+        builds.append((gear, jewels, pets))
+    return builds
+
+
+def run_js(db, builds):
+    with open(SCRIPT_FILE, "r", encoding="utf-8") as f:
+        source = f.read()
+    script = HARNESS % (js_block(source, "const gearCategories"), js_block(source, "function calculateFinalStats"))
+    payload = {
+        "data": {JS_CATEGORIES.get(name, name): index.items for name, index in db.indexes.items()},
+        "builds": [
+            {"gear": {JS_CATEGORIES.get(slot, slot): name for slot, name in gear.items()},
+             "jewels": jewels,
+             "pets": [{"type": t, "value": v, "school": s} for t, v, s in pets]}
+            for gear, jewels, pets in builds
+        ],
+    }
+    output = subprocess.run(["node", "-e", script], input=json.dumps(payload), capture_output=True,
+                            text=True, encoding="utf-8", check=True).stdout
+    return json.loads(output)
+
+
+def case_data(db, builds):
+    """
+    Return {category: [items]} holding the first item of each name the
+    builds use, reduced to the fields the totals depend on.
+    """
+    used = {}
+    for gear, jewels, _ in builds:
+        for slot, name in list(gear.items()) + [(JEWELS, name) for name in jewels]:
+            if name is not None:
+                used.setdefault(slot, set()).add(name)
+    data = {}
+    for category, names in used.items():
+        items = {}
+        for item in db.index(category).items:
+            name = item.get("Name", "")
+            if name in names and name not in items:
+                items[name] = {"Name": name, "bonuses": item.get("bonuses", [])}
+        data[category] = sorted(items.values(), key=lambda item: item["Name"])
+    return data
+
+
+def write_cases(db, builds, path=CASES_FILE):
+    """
+    Write the builds with the items they use and Script.js's totals for them.
+    """
+    data = case_data(db, builds)
+    expected = run_js(GearDB(data), builds)
+    cases = [{"gear": gear, "jewels": jewels, "pets": [list(talent) for talent in pets], "totals": totals}
+             for (gear, jewels, pets), totals in zip(builds, expected)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"data": data, "builds": cases}, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"Wrote {len(cases)} builds and their Script.js totals to '{path}'")
+
+
+def differences(expected, actual, tolerance=1e-6):
+    diffs = []
+    for stat in SCHOOL_TOTALS:
+        for school, value in expected[stat].items():
+            if abs(value - actual[stat][school]) > tolerance:
+                diffs.append(f"{stat}:{school} js={value} py={actual[stat][school]}")
+    for stat in SCALAR_TOTALS:
+        if abs(expected[stat] - actual[stat]) > tolerance:
+            diffs.append(f"{stat} js={expected[stat]} py={actual[stat]}")
+    return diffs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the Python stat engine against Script.js.")
+    parser.add_argument("--builds", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--write-cases", nargs="?", const=CASES_FILE,
+                        help="write the builds and Script.js's totals as test cases (default: DB/tests/engine_cases.json)")
+    args = parser.parse_args()
+
+    db = GearDB.load(GEAR_SLOTS + [JEWELS])
+    engine = StatEngine(db)
+    builds = random_builds(db, args.builds, random.Random(args.seed))
+    print(f"Loaded {', '.join(db.indexes)}; {len(builds)} random builds")
+
+    if shutil.which("node") is None:
+        print("node not found; skipping the comparison with Script.js")
+    elif args.write_cases:
+        write_cases(db, builds, args.write_cases)
+    else:
+        mismatches = 0
+        for build, expected in zip(builds, run_js(db, builds)):
+            diffs = differences(expected, engine.totals_dict(engine.evaluate(*build)))
+            if diffs:
+                mismatches += 1
+                if mismatches <= 10:
+                    print(f"Mismatch for {build}:\n  " + "\n  ".join(diffs))
+        print(f"{len(builds) - mismatches}/{len(builds)} builds match calculateFinalStats")
+
+    start = time.perf_counter()
+    for build in builds:
+        engine.evaluate(*build)
+    elapsed = time.perf_counter() - start
+    print(f"StatEngine: {len(builds) / elapsed:,.0f} builds/s")
+
+
+if __name__ == "__main__":
+    main()
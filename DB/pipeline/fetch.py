@@ -0,0 +1,67 @@
+"""
+Page fetching for the extraction scripts.
+
+fetch_pages() keeps up to `workers` requests in flight on one shared
+cloudscraper session and hands pages back in input order, so callers can
+keep their existing "for each item" loop and output ordering.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+import cloudscraper
+
+from pipeline.parallel import ordered_map
+
+# Default number of concurrent page requests.
+DEFAULT_WORKERS = 8
+
+
+def create_scraper(workers=DEFAULT_WORKERS):
+    """
+    Create a cloudscraper session whose connection pool can hold one
+    keep-alive connection per worker thread.
+    """
+    scraper = cloudscraper.create_scraper()
+    for adapter in scraper.adapters.values():
+        adapter.init_poolmanager(workers, workers)
+    return scraper
+
+
+def rebase_url(url, base_url):
+    """
+    Point `url` at `base_url` (scheme and host), keeping its path and query.
+    Used to send the wiki URLs to a local stand-in server.
+    """
+    if not base_url:
+        return url
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+
+def fetch_pages(scraper, urls, workers=DEFAULT_WORKERS, base_url=None, pool=None):
+    """
+    Fetch every URL in `urls` and yield (url, html) pairs in input order.
+
+    With workers > 1 the requests run on a thread pool (`pool` if given,
+    so several categories can share one); at most `workers * 2` pages are
+    fetched ahead of the consumer so memory stays bounded. With
+    workers == 1 this is the plain serial loop.
+    """
+    def fetch(url):
+        response = scraper.get(rebase_url(url, base_url))
+        return response.text
+
+    if workers <= 1:
+        for url in urls:
+            yield url, fetch(url)
+        return
+
+    url_args = ((url,) for url in urls)
+    if pool is None:
+        with ThreadPoolExecutor(max_workers=workers) as own_pool:
+            for (url,), html in ordered_map(own_pool, fetch, url_args, workers * 2):
+                yield url, html
+    else:
+        for (url,), html in ordered_map(pool, fetch, url_args, workers * 2):
+            yield url, html
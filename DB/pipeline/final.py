@@ -0,0 +1,281 @@
+"""
+Final stage: turn RAW_<Category>_Data.json into <Category>_Data.json.
+
+Renames fields, counts sockets, maps bonus text onto its icons and cleans
+category links into "School Type". Jewels keep their socket/type/school
+lists and drop categories; Wands apply an extra rule for bonuses whose
+icons repeat. Every item also gets its bonuses in numeric form under
+"stats" (see pipeline.stats), and the category's stat matrix is written
+for vectorized scoring (see pipeline.matrix) with its Pareto frontiers
+(see pipeline.frontier), as are its per-level-bracket shards for the web
+client (see pipeline.shards) and its minified, precompressed copies
+(see pipeline.compact). With an ItemStore, the output is also loaded into
+the SQLite item database (see pipeline.store); with a TransformMemo,
+unchanged RAW items reuse their earlier result (see pipeline.memo), and
+when the Final file comes out the same as last time, the outputs derived
+from it are left as they are.
+"""
+import os
+import re
+import time
+
+from pipeline.compact import brotli_compressor, compact_file, size_report, write_compact
+from pipeline.frontier import frontier_file, write_frontier
+from pipeline.jsonio import dump_array, iter_array, write_array
+from pipeline.matrix import matrix_file, matrix_index_file, write_matrix
+from pipeline.metrics import METRICS
+from pipeline.profiles import final_file, raw_file
+from pipeline.query import LEVEL_BRACKETS
+from pipeline.shards import category_manifest_file, shard_file, write_shards
+from pipeline.stats import numeric_bonuses
+
+
+def swap_if_wizards(mapping):
+    """
+    If mapping is a single key/value pair and the value is exactly
+    "Wizards Cannot Use", swap the key and value.
+    For example:
+       { "Balance": "Wizards Cannot Use" }  =>  { "Wizards Cannot Use": "Balance" }
+    """
+    if isinstance(mapping, dict) and len(mapping) == 1:
+        key, value = list(mapping.items())[0]
+        if isinstance(value, str) and value == "Wizards Cannot Use":
+            return {"Wizards Cannot Use": key}
+    return mapping
+
+
+def deduplicate_list(lst):
+    """Deduplicate a list while preserving order."""
+    seen = set()
+    deduped = []
+    for item in lst:
+        if item not in seen:
+            deduped.append(item)
+            seen.add(item)
+    return deduped
+
+
+def strip_bonus_text(text, profile):
+    """
+    Remove extraneous spaces and the profile's filler words ("Max", ...) from bonus text.
+    """
+    text = text.strip()
+    for word in profile.strip_words:
+        text = text.replace(word, "")
+    return text.strip()
+
+
+def pair_icons(icons, tokens):
+    """
+    Pair the first (n-1) icons with the bonus tokens under the last icon,
+    e.g. ["Fire", "Damage"] + ["+15%"] => {"Damage": {"Fire": "+15%"}}.
+    """
+    num_pairs = len(icons) - 1  # expecting the first (n-1) icons pair with tokens
+    paired_tokens = tokens[:num_pairs]
+    inner_mapping = {}
+    for i in range(num_pairs):
+        token = paired_tokens[i] if i < len(paired_tokens) else ""
+        inner_mapping[icons[i]] = token
+    return {icons[-1]: inner_mapping}
+
+
+def transform_gear_bonuses(bonuses, profile):
+    """
+    Map gear bonus text onto its icons.
+    """
+    new_bonuses = []
+    for bonus in bonuses:
+        bonus_text = strip_bonus_text(bonus.get("bonus", ""), profile)
+        icons = bonus.get("icons", [])
+        # Skip bonus entries that are empty or missing icons
+        if not bonus_text or not icons:
+            continue
+
+        tokens = bonus_text.split()
+
+        if profile.final_rules == "wand":
+            # --- Special Processing for Wand Bonuses with Duplicate Icons After Deduplication ---
+            # If the deduplicated icons count is greater than one and the number of tokens
+            # equals (dedup_icons - 1), pair the tokens with the deduplicated icons.
+            dedup_icons = deduplicate_list(icons)
+            if len(dedup_icons) > 1 and len(tokens) == (len(dedup_icons) - 1):
+                new_bonuses.append(swap_if_wizards(pair_icons(dedup_icons, tokens)))
+                continue
+
+        if len(icons) == 1:
+            bonus_mapping = {icons[0]: bonus_text}
+        else:
+            bonus_mapping = pair_icons(icons, tokens)
+        new_bonuses.append(swap_if_wizards(bonus_mapping))
+    return new_bonuses
+
+
+def transform_jewel_bonuses(bonuses, profile):
+    """
+    Map jewel effect text onto its icons. Jewel icons come in duplicate
+    pairs, so the school/stat icons sit at every other position.
+    """
+    new_bonuses = []
+    for bonus in bonuses:
+        bonus_text = strip_bonus_text(bonus.get("bonus", ""), profile)
+        bonus_tokens = bonus_text.split()  # Split bonus text into tokens
+
+        # Process icons: replace "Damage Alternate" with "Damage" and "Healing Alternate" with "Healing"
+        icons = [
+            "Damage" if icon == "Damage Alternate"
+            else "Healing" if icon == "Healing Alternate"
+            else icon
+            for icon in bonus.get("icons", [])
+        ]
+
+        if len(bonus_tokens) == 1 and len(icons) >= 4:
+            # Single bonus token case:
+            # Use the second duplicated group: outer key = icons[2] and inner key = icons[0]
+            new_bonuses.append(swap_if_wizards({icons[2]: {icons[0]: bonus_tokens[0]}}))
+        elif len(bonus_tokens) >= 2 and len(icons) >= 8:
+            # Multi bonus tokens case (using raw icons list in duplicate pairs)
+            new_bonuses.append(swap_if_wizards({icons[2]: {icons[0]: bonus_tokens[0]}}))
+            new_bonuses.append(swap_if_wizards({icons[6]: {icons[4]: bonus_tokens[1]}}))
+        else:
+            # Fallback: simple mapping using the first icon if available.
+            new_bonuses.append(swap_if_wizards({icons[0] if icons else "": bonus_text}))
+    return new_bonuses
+
+
+def clean_categories(categories):
+    """
+    Deduplicate category links (preserving order), remove the "/wiki/Category:" prefix
+    and the "_School_Items" suffix, and ignore any category that includes "_Spells".
+    A single remaining category is returned as a string rather than a list.
+    """
+    seen = set()
+    deduped_categories = []
+    for cat in categories:
+        if cat.startswith("/wiki/Category:"):
+            cat_clean = cat[len("/wiki/Category:"):]
+        else:
+            cat_clean = cat
+        cat_clean = cat_clean.replace("_School_Items", "")
+        if "_Spells" in cat_clean:
+            continue
+        if cat_clean not in seen:
+            deduped_categories.append(cat_clean)
+            seen.add(cat_clean)
+    if len(deduped_categories) == 1:
+        return deduped_categories[0]
+    return deduped_categories
+
+
+def transform_item(item, profile):
+    """
+    Transform one RAW record into its Final form.
+    """
+    new_item = {}
+    if profile.final_rules == "jewel":
+        # Only remove a leading "Jewel:" from the title
+        new_item["Name"] = re.sub(r"^Jewel:", "", item.get("title", "")).strip()
+    else:
+        new_item["Name"] = item.get("title", "").strip()
+
+    # --- Copy Standard Fields ---
+    new_item["url"] = item.get("url", "")
+    # Rename level_required to level
+    new_item["level"] = item.get("level_required", "")
+    new_item["tradeable"] = item.get("tradeable", False)
+    new_item["no_auction"] = item.get("no_auction", False)
+    new_item["status"] = item.get("status", "")
+
+    if profile.final_rules == "jewel":
+        new_item["sockets"] = item.get("sockets", [])
+        # --- Deduplicate "type", "school", and "weaving_school" fields if present ---
+        for key in ("type", "school", "weaving_school"):
+            if key in item:
+                new_item[key] = deduplicate_list(item.get(key, []))
+        new_item["bonuses"] = transform_jewel_bonuses(item.get("bonuses", []), profile)
+        new_item["stats"] = numeric_bonuses(new_item["bonuses"])
+        # --- Omit the "category" field entirely ---
+        return new_item
+
+    # --- Process Sockets ---
+    # Count the socket strings and subtract 1.
+    # If there are no sockets, return [0] instead of [-1].
+    socket_list = item.get("sockets", [])
+    new_item["sockets"] = [max(len(socket_list) - 1, 0)]
+
+    new_item["bonuses"] = transform_gear_bonuses(item.get("bonuses", []), profile)
+    new_item["School Type"] = clean_categories(item.get("category", []))
+    new_item["stats"] = numeric_bonuses(new_item["bonuses"])
+    return new_item
+
+
+def timed_transform_item(item, profile):
+    """
+    transform_item(), recording its time in the transform_seconds metric.
+    """
+    start = time.perf_counter()
+    new_item = transform_item(item, profile)
+    METRICS.observe("transform_seconds", time.perf_counter() - start, category=profile.name)
+    return new_item
+
+
+def iter_final(profile):
+    """
+    Yield the items of a category's Final file one at a time.
+    """
+    with open(final_file(profile), "r", encoding="utf-8") as f:
+        yield from iter_array(f)
+
+
+def derived_outputs(profile):
+    """
+    The files the Final stage writes from a category's Final file.
+    """
+    outputs = [matrix_file(profile), matrix_index_file(profile), frontier_file(profile),
+               category_manifest_file(profile), compact_file(profile), compact_file(profile) + ".gz"]
+    outputs += [shard_file(profile, low, high) for low, high in LEVEL_BRACKETS]
+    if brotli_compressor() is not None:
+        outputs.append(compact_file(profile) + ".br")
+    return outputs
+
+
+def run_final(profile, store=None, memo=None):
+    """
+    Run the Final stage for one category, replacing its items in `store` if given.
+
+    RAW items are read, transformed and written one at a time, and the
+    other outputs are made from the Final file in one pass each, so memory
+    does not grow with the size of the category. With a TransformMemo,
+    only RAW items it has not seen before are transformed, and the other
+    outputs are only written if the Final file changed since they were.
+    """
+    input_file = raw_file(profile)
+    output_file = final_file(profile)
+
+    with open(input_file, "r", encoding="utf-8") as inf, open(output_file + ".tmp", "w", encoding="utf-8") as outf:
+        if memo is not None:
+            write_array(memo.transform_texts(iter_array(inf, with_text=True), profile, timed_transform_item), outf)
+        else:
+            dump_array((timed_transform_item(item, profile) for item in iter_array(inf)), outf)
+    os.replace(output_file + ".tmp", output_file)
+    if memo is not None:
+        hits, misses = memo.finish(profile)
+        METRICS.count("transform_cache", hits, category=profile.name, result="hit")
+        METRICS.count("transform_cache", misses, category=profile.name, result="miss")
+        print(f"{misses} {profile.name} items transformed, {hits} reused from the transform cache")
+
+    print(f"Transformed JSON written to '{output_file}'")
+    digest = memo.final_digest(profile) if memo is not None else None
+    if digest is not None and memo.outputs_current(profile, digest) \
+            and all(os.path.exists(path) for path in derived_outputs(profile)):
+        print(f"{profile.name} Final file unchanged; matrix, frontier, shards and compact files kept")
+    else:
+        write_matrix(profile, iter_final(profile))
+        write_frontier(profile, iter_final(profile))
+        write_shards(profile, iter_final(profile))
+        print(size_report(profile, write_compact(profile, iter_final(profile))))
+        if digest is not None:
+            memo.record_outputs(profile, digest)
+
+    if store is not None:
+        count = store.replace_category(profile, iter_final(profile))
+        print(f"{count} {profile.name} items loaded into the item store")
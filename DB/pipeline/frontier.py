@@ -0,0 +1,149 @@
+"""
+Pareto frontier of each category per level bracket and school.
+
+Within one level bracket and school most items are dominated: another
+item is as good on every stat matrix column (and has as many sockets) and
+better on at least one, and also has every non-numeric bonus the other
+has (an "Allows" pip, a deck's "Maximum Copies") and is not retired if
+the other is not. The Final bonuses keep only "Item" of a wiki item card
+list, not which cards, so an item giving cards is never dominated at all.
+The Final stage writes the rest, the frontier, to
+<Category>_Data/<Category>_Frontier.json:
+
+    {"items": 2663,
+     "frontier": {"130-159": {"Fire": [12, 40, ...], ...}, ...}}
+
+where the numbers are positions in <Category>_Data.json. Brackets are the
+calculator's getLevelBracket() brackets and membership follows its
+dropdown filters: "Any Level" items are in every bracket, "Any" School Type
+items in every school, and jewels without a school in every school. Items
+whose "Wizards Cannot Use" names the school are left out of it.
+"""
+import json
+import os
+
+from pipeline.matrix import item_columns
+from pipeline.profiles import data_dir
+from pipeline.query import LEVEL_BRACKETS, item_level
+from pipeline.stats import stat_row
+from pipeline.store import item_school
+
+# The schools a wizard can pick in the calculator
+FRONTIER_SCHOOLS = ("Fire", "Ice", "Storm", "Myth", "Life", "Death", "Balance")
+
+
+def frontier_file(profile):
+    return os.path.join(data_dir(profile), f"{profile.name}_Frontier.json")
+
+
+def item_features(item, position):
+    """
+    Return the set of what an item offers besides its stat matrix columns:
+    its non-numeric bonuses (an item card list as one feature no other item
+    has, as the cards are unknown) and "active" unless it is retired.
+    """
+    features = set()
+    for bonus in item.get("bonuses", []):
+        for stat, value in bonus.items():
+            if stat == "Wizards Cannot Use":
+                continue  # handled by leaving the item out of that school
+            pairs = value.items() if isinstance(value, dict) else [(None, value)]
+            for school, text in pairs:
+                if stat_row(stat, school, text) is not None:
+                    continue
+                if stat == "Counter" or "Card" in str(text) or str(text).strip() == "Item":
+                    features.add(("cards", position))
+                else:
+                    features.add((stat, school, str(text)))
+    if item.get("status") != "Retired":
+        features.add("active")
+    return frozenset(features)
+
+
+def dominates(a, b, a_features=frozenset(), b_features=frozenset()):
+    """
+    Whether sparse vector `a` ({column: value}) is at least `b` everywhere,
+    `a_features` include `b_features`, and the two differ somewhere.
+    """
+    if not a_features >= b_features:
+        return False
+    if a == b:
+        return a_features != b_features
+    for column in a.keys() | b.keys():
+        if a.get(column, 0) < b.get(column, 0):
+            return False
+    return True
+
+
+def pareto_frontier(ids, vectors, features=None):
+    """
+    Return the ids that no other id dominates, in id order, given their
+    vectors and (optionally) their feature sets.
+
+    Candidates are visited by decreasing sum and then number of features,
+    so an item can only be dominated by one visited before it, and by
+    transitivity it is enough to compare it with the frontier found so far.
+    """
+    if features is None:
+        features = [frozenset()] * len(vectors)
+    frontier = []
+    for i in sorted(ids, key=lambda i: (sum(vectors[i].values()), len(features[i])), reverse=True):
+        if not any(dominates(vectors[j], vectors[i], features[j], features[i]) for j in frontier):
+            frontier.append(i)
+    return sorted(frontier)
+
+
+def compute_frontiers(profile, items):
+    """
+    Return ({"<min>-<max>": {school: [item positions]}}, item count) for a
+    category. `items` may be any iterable; only each item's vector,
+    features, level, school and unusable schools are kept.
+    """
+    vectors = []
+    features = []
+    levels = []
+    schools = []
+    cannot_use = []
+    for item in items:
+        vector = {column: value for column, value in item_columns(item).items() if value}
+        if profile.final_rules != "jewel":
+            sockets = (item.get("sockets") or [0])[0]
+            if sockets:
+                vector["sockets"] = sockets
+        vectors.append(vector)
+        features.append(item_features(item, len(features)))
+        levels.append(item_level(item))
+        schools.append((item_school(item) or "").lower())
+        cannot_use.append({str(bonus["Wizards Cannot Use"]).lower()
+                           for bonus in item.get("bonuses", []) if "Wizards Cannot Use" in bonus})
+    shared_school = {"any", ""} if profile.final_rules == "jewel" else {"any"}
+
+    frontiers = {}
+    for low, high in LEVEL_BRACKETS:
+        in_bracket = [i for i, level in enumerate(levels)
+                      if level == "any" or (level is not None and low <= level <= high)]
+        by_school = {}
+        for school in FRONTIER_SCHOOLS:
+            key = school.lower()
+            ids = [i for i in in_bracket
+                   if (schools[i] == key or schools[i] in shared_school) and key not in cannot_use[i]]
+            by_school[school] = pareto_frontier(ids, vectors, features)
+        frontiers[f"{low}-{high}"] = by_school
+    return frontiers, len(vectors)
+
+
+def write_frontier(profile, items):
+    """
+    Write <Category>_Frontier.json for a category's Final items.
+    """
+    frontiers, count = compute_frontiers(profile, items)
+    with open(frontier_file(profile), "w", encoding="utf-8") as f:
+        json.dump({"items": count, "frontier": frontiers}, f, separators=(",", ":"))
+    sizes = [len(ids) for by_school in frontiers.values() for ids in by_school.values()]
+    print(f"Pareto frontier: {min(sizes, default=0)}-{max(sizes, default=0)} of {count} "
+          f"{profile.name} items per bracket and school, written to '{frontier_file(profile)}'")
+
+
+def load_frontier(profile):
+    with open(frontier_file(profile), "r", encoding="utf-8") as f:
+        return json.load(f)["frontier"]
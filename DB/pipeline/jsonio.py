@@ -0,0 +1,93 @@
+"""
+Streaming JSON helpers.
+
+dump_array() writes records one at a time but produces exactly the bytes
+json.dump(records, f, indent=2, ensure_ascii=False) would, so outputs stay
+identical to the old all-in-memory writers. iter_array() is the reading
+side: it yields the elements of a JSON array file one at a time, holding
+only a chunk of the file and the element being decoded.
+"""
+import json
+
+# Characters that can continue a JSON number
+NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+def element_text(record):
+    """
+    The text of one record as dump_array() writes it.
+    """
+    return json.dumps(record, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+
+
+def write_array(texts, f):
+    """
+    Write an iterable of element_text() strings to `f` as a JSON array.
+    """
+    first = True
+    for text in texts:
+        f.write("[\n  " if first else ",\n  ")
+        f.write(text)
+        first = False
+    f.write("[]" if first else "\n]")
+
+
+def dump_array(records, f):
+    """
+    Write an iterable of records to `f` as an indented JSON array.
+    """
+    write_array(map(element_text, records), f)
+
+
+def iter_array(f, chunk_size=1 << 16, with_text=False):
+    """
+    Yield the elements of the JSON array in text file `f`; with
+    `with_text`, as (element, its source text) pairs.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+
+    def next_char():
+        # Skip whitespace, reading on as needed; "" at the end of the file
+        nonlocal buffer, pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            buffer, pos = f.read(chunk_size), 0
+            if not buffer:
+                return ""
+
+    if next_char() != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    if next_char() == "]":
+        return
+    while True:
+        next_char()
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            record, end = None, None
+        # An element running into the end of the buffer may continue in the
+        # file; a number cut off after e.g. "0." or "1e" decodes as a shorter
+        # number followed by the rest of its own text
+        if end is None or end == len(buffer) or (
+                isinstance(record, (int, float)) and not isinstance(record, bool) and buffer[end] in NUMBER_CHARS):
+            more = f.read(chunk_size)
+            if more:
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            if end is None:
+                raise ValueError("Truncated or invalid JSON array")
+        text = buffer[pos:end] if with_text else None
+        pos = end
+        yield (record, text) if with_text else record
+        char = next_char()
+        if char == "]":
+            return
+        if char != ",":
+            raise ValueError(f"Expected ',' or ']' in JSON array, found {char!r}")
+        pos += 1
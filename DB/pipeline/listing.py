@@ -0,0 +1,107 @@
+"""
+URL stage: collect item links from a wiki category listing.
+
+Follows the "next page" link of the category's mw-pages section and
+writes <Category>_URL.json as a list of {"title", "url"} entries. Each
+category's pagination is a chain of dependent requests, so the chains of
+all categories are crawled concurrently on the shared session and each
+listing is written as soon as its own chain finishes.
+
+Each listing is written exactly as the wiki lists it, "previous page"
+links included, as the original scripts wrote it; the RAW stage skips
+those links (see pipeline.raw.pending_items). Titles listed in more than
+one category are only counted, not removed: each category's files must
+hold all of its items, and a page shared by two categories is fetched
+once and then answered by the page cache. (On the current listings no
+item is in two categories; the Wands listing's 7,174 entries are 7,104
+distinct items plus 70 "previous page" links.)
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from pipeline.fetch import rebase_url
+from pipeline.profiles import data_dir, url_file
+
+# Base URL of the wiki
+BASE_URL = "https://wiki.wizard101central.com"
+
+
+def crawl_listing(scraper, profile, base_url=None):
+    """
+    Walk every page of the profile's category listing and return the item links.
+    """
+    page_url = profile.listing_page
+    all_links = []  # This list will hold dictionaries with "title" and "url"
+
+    while page_url:
+        # Build the absolute URL for the current page and fetch it
+        current_url = urljoin(BASE_URL, page_url)
+        print(f"Fetching ({profile.name}): {current_url}")
+        response = scraper.get(rebase_url(current_url, base_url))
+
+        # Parse the page content
+        soup = BeautifulSoup(response.text, "lxml")
+
+        # Find the div containing the page links using its id 'mw-pages'
+        mw_pages_div = soup.find("div", id="mw-pages")
+        if mw_pages_div:
+            # Iterate over all <a> tags in the container
+            for a in mw_pages_div.find_all("a"):
+                link_text = a.get_text().strip()
+                # Exclude the "next page" link
+                if link_text.lower() == "next page":
+                    continue
+                href = a.get("href")
+                if href:
+                    full_url = urljoin(BASE_URL, href)
+                    all_links.append({"title": link_text, "url": full_url})
+        else:
+            print("Warning: 'mw-pages' section not found on this page.")
+
+        # Look for the "next page" button in the current mw-pages div
+        next_button = mw_pages_div.find("a", string="next page") if mw_pages_div else None
+        if next_button and next_button.get("href"):
+            page_url = next_button["href"]
+        else:
+            page_url = None
+
+    return all_links
+
+
+def write_listing(profile, all_links):
+    """
+    Export the collected links to <Category>_URL.json.
+    """
+    output_filename = url_file(profile)
+    os.makedirs(data_dir(profile), exist_ok=True)
+    with open(output_filename, "w", encoding="utf-8") as f:
+        json.dump(all_links, f, indent=2, ensure_ascii=False)
+    print(f"\nCollected {len(all_links)} links. Results have been exported to '{output_filename}'.")
+
+
+def run_listings(profiles, scraper, base_url=None):
+    """
+    Run the URL stage for several categories at once.
+    """
+    category_urls = {}
+    with ThreadPoolExecutor(max_workers=max(len(profiles), 1)) as executor:
+        futures = {executor.submit(crawl_listing, scraper, profile, base_url): profile for profile in profiles}
+        for future in as_completed(futures):
+            profile = futures[future]
+            links = future.result()
+            write_listing(profile, links)
+            category_urls[profile.name] = {link["url"] for link in links
+                                           if link["title"].strip().lower() != "previous page"}
+
+    # Items listed in more than one category are kept in each of them
+    counts = {}
+    for urls in category_urls.values():
+        for url in urls:
+            counts[url] = counts.get(url, 0) + 1
+    shared = sum(1 for count in counts.values() if count > 1)
+    if shared:
+        print(f"{shared} items are listed in more than one category.")
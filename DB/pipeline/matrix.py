@@ -0,0 +1,138 @@
+"""
+Columnar stat matrix of each category, for vectorized scoring.
+
+The Final stage writes, next to <Category>_Data.json:
+
+    <Category>_Stats.npy   float32 matrix, one row per item (in Final order)
+                           and one column per entry of COLUMNS
+    <Category>_Stats.json  {"columns": [...], "name": [...], "level": [...],
+                           "school": [...]}: the column names and, per row,
+                           the item name, level (the number in "150+", 0 for
+                           "Any Level", null if unknown) and School Type
+
+The .npy file is written without NumPy, but is meant to be opened with it:
+
+    matrix, index = load_matrix(get_profile("Amulets"))   # memory-mapped
+    scores = matrix @ weight_vector({"Damage:Fire": 3, "Critical:Fire": 0.1})
+
+School stats get one column per school, as the calculator adds them up:
+a Global bonus (or one with no school) counts towards every school, and
+"Any" bonuses are left out. Several bonuses on the same column are summed.
+"""
+import json
+import os
+import shutil
+import struct
+import sys
+from array import array
+
+from pipeline.profiles import data_dir
+from pipeline.query import item_level
+from pipeline.stats import SCHOOLS, STATS, item_stats
+from pipeline.store import item_school
+
+# The calculator's school-based stats and schools (calculateFinalStats)
+SCHOOL_STATS = ("Damage", "Flat Damage", "Resistance", "Flat Resistance", "Accuracy",
+                "Critical", "Critical Block", "Armor Piercing", "Pip Conversion")
+MATRIX_SCHOOLS = ("Fire", "Ice", "Storm", "Myth", "Life", "Death", "Balance", "Shadow")
+COLUMNS = [f"{stat}:{school}" for stat in SCHOOL_STATS for school in MATRIX_SCHOOLS] + [
+    stat for stat in STATS if stat not in SCHOOL_STATS
+]
+COLUMN_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+
+
+def matrix_file(profile):
+    return os.path.join(data_dir(profile), f"{profile.name}_Stats.npy")
+
+
+def matrix_index_file(profile):
+    return os.path.join(data_dir(profile), f"{profile.name}_Stats.json")
+
+
+def item_columns(item):
+    """
+    Return {column index: value} for one Final item.
+    """
+    values = {}
+    for stat_id, school_id, value, _ in item_stats(item):
+        stat = STATS[stat_id]
+        school = SCHOOLS[school_id] if school_id is not None else "Global"
+        if stat not in SCHOOL_STATS:
+            columns = [COLUMN_INDEX[stat]]
+        elif school == "Global":
+            columns = [COLUMN_INDEX[f"{stat}:{s}"] for s in MATRIX_SCHOOLS]
+        elif school in MATRIX_SCHOOLS:
+            columns = [COLUMN_INDEX[f"{stat}:{school}"]]
+        else:
+            continue
+        for column in columns:
+            values[column] = values.get(column, 0) + value
+    return values
+
+
+def npy_header(rows, cols):
+    """
+    Return the version 1.0 .npy header of a float32 matrix of rows x cols.
+    """
+    header = f"{{'descr': '<f4', 'fortran_order': False, 'shape': ({rows}, {cols}), }}"
+    # Pad so the data starts on a 64-byte boundary, as numpy.save does
+    padding = -(10 + len(header) + 1) % 64
+    header = (header + " " * padding + "\n").encode("latin1")
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header
+
+
+def write_matrix(profile, items):
+    """
+    Write the stat matrix and its index for a category's Final items.
+    `items` may be any iterable; rows go to a scratch file as they are
+    made, since the header needs the row count.
+    """
+    width = len(COLUMNS)
+    path = matrix_file(profile)
+    index = {"columns": COLUMNS, "name": [], "level": [], "school": []}
+    rows = 0
+    with open(path + ".rows", "w+b") as scratch:
+        for item in items:
+            row = array("f", bytes(4 * width))
+            for column, value in item_columns(item).items():
+                row[column] = value
+            if sys.byteorder == "big":
+                row.byteswap()
+            row.tofile(scratch)
+            rows += 1
+            level = item_level(item)
+            index["name"].append(item.get("Name", ""))
+            index["level"].append(0 if level == "any" else level)
+            index["school"].append(item_school(item))
+        scratch.seek(0)
+        with open(path, "wb") as f:
+            f.write(npy_header(rows, width))
+            shutil.copyfileobj(scratch, f)
+    os.remove(path + ".rows")
+
+    with open(matrix_index_file(profile), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+
+
+def load_matrix(profile, mmap=True):
+    """
+    Return (matrix, index) for a category; needs NumPy.
+    """
+    import numpy as np
+
+    matrix = np.load(matrix_file(profile), mmap_mode="r" if mmap else None)
+    with open(matrix_index_file(profile), "r", encoding="utf-8") as f:
+        index = json.load(f)
+    return matrix, index
+
+
+def weight_vector(weights):
+    """
+    Turn {column name: weight} into a float32 vector over COLUMNS; needs NumPy.
+    """
+    import numpy as np
+
+    vector = np.zeros(len(COLUMNS), dtype=np.float32)
+    for name, weight in weights.items():
+        vector[COLUMN_INDEX[name]] = weight
+    return vector
@@ -0,0 +1,123 @@
+"""
+Memoized Final transform.
+
+Transformed items are kept in one SQLite file (DB/.transform_cache.sqlite
+by default), as the text the Final file holds for them, keyed on the
+sha256 of the RAW item's text, the category profile and RULES_VERSION, a
+hash of the modules holding the transform rules. A rerun of the Final
+stage then only transforms and serializes the RAW items that changed
+since the last run; editing the rules changes RULES_VERSION and so
+retransforms everything. Entries of a category that its last run did not
+use are dropped at the end of the run, so the cache holds one entry per
+current item.
+
+The cache also records, per category, the sha256 of the Final file its
+derived outputs (matrix, frontier, shards, minified and compressed
+copies) were last written from, together with OUTPUTS_VERSION, a hash of
+the modules writing them. When a run produces the same Final file and
+those outputs are all still there, they are not written again.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+
+from pipeline.jsonio import element_text
+from pipeline.profiles import DB_DIR, final_file
+
+DEFAULT_MEMO_FILE = os.path.join(DB_DIR, ".transform_cache.sqlite")
+# transform_item() and what it calls
+RULES_MODULES = ("final.py", "stats.py", "jsonio.py")
+# What writes the outputs derived from a Final file
+OUTPUTS_MODULES = ("final.py", "matrix.py", "frontier.py", "shards.py", "compact.py", "query.py", "stats.py",
+                   "store.py", "profiles.py")
+
+
+def modules_version(names):
+    digest = hashlib.sha256()
+    for name in names:
+        with open(os.path.join(DB_DIR, "pipeline", name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def rules_version():
+    return modules_version(RULES_MODULES)
+
+
+class TransformMemo:
+    """
+    SQLite-backed transform results, safe to share between threads.
+    """
+
+    def __init__(self, path=DEFAULT_MEMO_FILE):
+        self.version = rules_version()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS transforms (key TEXT PRIMARY KEY, category TEXT, text TEXT)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS transforms_category ON transforms (category)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS outputs (category TEXT PRIMARY KEY, digest TEXT)")
+        self.runs = {}  # category -> [keys used by the current run, hits, misses]
+
+    def transform_texts(self, pairs, profile, transform_item):
+        """
+        Yield the Final element text of each (RAW item, RAW text) pair, as
+        jsonio.iter_array(..., with_text=True) yields them.
+        """
+        prefix = f"{self.version}\n{tuple(profile)!r}\n".encode("utf-8")
+        run = self.runs.setdefault(profile.name, [set(), 0, 0])
+        for item, raw_text in pairs:
+            key = hashlib.sha256(prefix + raw_text.encode("utf-8")).hexdigest()
+            run[0].add(key)
+            with self.lock:
+                row = self.conn.execute("SELECT text FROM transforms WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                run[1] += 1
+                yield row[0]
+                continue
+            text = element_text(transform_item(item, profile))
+            with self.lock:
+                self.conn.execute("INSERT OR REPLACE INTO transforms VALUES (?, ?, ?)", (key, profile.name, text))
+            run[2] += 1
+            yield text
+
+    def finish(self, profile):
+        """
+        Commit a category's run, drop its entries the run did not use and
+        return (hits, misses).
+        """
+        used, hits, misses = self.runs.pop(profile.name, [set(), 0, 0])
+        with self.lock:
+            stale = [key for (key,) in self.conn.execute(
+                "SELECT key FROM transforms WHERE category = ?", (profile.name,)) if key not in used]
+            self.conn.executemany("DELETE FROM transforms WHERE key = ?", [(key,) for key in stale])
+            self.conn.commit()
+        return hits, misses
+
+    def final_digest(self, profile):
+        """
+        The sha256 of a category's Final file and the modules writing its derived outputs.
+        """
+        digest = hashlib.sha256(modules_version(OUTPUTS_MODULES).encode("ascii"))
+        with open(final_file(profile), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def outputs_current(self, profile, digest):
+        """
+        Whether the derived outputs were last written from a Final file with this digest.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT digest FROM outputs WHERE category = ?", (profile.name,)).fetchone()
+        return row is not None and row[0] == digest
+
+    def record_outputs(self, profile, digest):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO outputs VALUES (?, ?)", (profile.name, digest))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
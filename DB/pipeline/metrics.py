@@ -0,0 +1,207 @@
+"""
+Run metrics for the pipeline: counters, timing histograms and the slowest pages.
+
+Stages record into the shared METRICS registry as they go:
+
+    METRICS.count("fetch_bytes", len(response.content))
+    METRICS.count("cache_requests", result="revalidated")
+    METRICS.page("fetch", url, seconds)      # histogram + slowest pages table
+    with METRICS.time("stage_seconds", stage="raw", category="Wands"):
+        ...
+
+At the end of a run `python -m pipeline` (and pipeline.build) writes them
+to DB/pipeline_metrics.json and, in the Prometheus text exposition format,
+to DB/pipeline_metrics.prom, and prints a summary with the slowest pages.
+Every metric name is prefixed with "pipeline_" in the Prometheus output.
+"""
+import heapq
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from pipeline.profiles import DB_DIR
+
+DEFAULT_METRICS_FILE = os.path.join(DB_DIR, "pipeline_metrics.json")
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SLOWEST = 10
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                break
+        else:
+            i = len(BUCKETS)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """
+        The upper bound of the bucket holding the q-quantile (max for the last one).
+        """
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    """
+    Thread-safe metrics of one run; labels are keyword arguments.
+    """
+
+    def __init__(self, slowest_count=SLOWEST):
+        self.lock = threading.Lock()
+        self.slowest_count = slowest_count
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.counters = {}
+            self.histograms = {}
+            self.slowest = {}  # kind -> min-heap of (seconds, url)
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def count(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def time(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def page(self, kind, url, seconds):
+        """
+        Record how long a page took to `kind` ("fetch" or "parse").
+        """
+        self.observe(f"{kind}_seconds", seconds)
+        with self.lock:
+            heap = self.slowest.setdefault(kind, [])
+            if len(heap) < self.slowest_count:
+                heapq.heappush(heap, (seconds, url))
+            elif seconds > heap[0][0]:
+                heapq.heapreplace(heap, (seconds, url))
+
+    def slowest_pages(self, kind):
+        """
+        [(seconds, url)] of the slowest pages to `kind`, slowest first.
+        """
+        with self.lock:
+            return sorted(self.slowest.get(kind, ()), reverse=True)
+
+    def cache_hit_ratio(self):
+        results = {dict(labels).get("result"): value for (name, labels), value in self.counters.items()
+                   if name == "cache_requests"}
+        total = sum(results.values())
+        hits = results.get("fresh", 0) + results.get("revalidated", 0)
+        return hits / total if total else None
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "started": self.started,
+                "seconds": time.time() - self.started,
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in sorted(self.counters.items())],
+                "histograms": [{"name": name, "labels": dict(labels), "count": h.count, "sum": h.sum,
+                                "max": h.max, "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], h.counts))}
+                               for (name, labels), h in sorted(self.histograms.items())],
+                "cache_hit_ratio": self.cache_hit_ratio(),
+                "slowest_pages": {kind: [{"url": url, "seconds": seconds} for seconds, url in sorted(heap, reverse=True)]
+                                  for kind, heap in self.slowest.items()},
+            }
+
+    def to_prometheus(self):
+        def labels_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self.lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = f"pipeline_{name}_total"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} counter")
+                    typed.add(metric)
+                lines.append(f"{metric}{labels_text(labels)} {value}")
+            for (name, labels), h in sorted(self.histograms.items()):
+                metric = f"pipeline_{name}"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} histogram")
+                    typed.add(metric)
+                cumulative = 0
+                for bound, count in zip([str(b) for b in BUCKETS] + ["+Inf"], h.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{labels_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{metric}_sum{labels_text(labels)} {h.sum}")
+                lines.append(f"{metric}_count{labels_text(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=DEFAULT_METRICS_FILE):
+        """
+        Write the metrics as JSON to `path` and as Prometheus text next to it.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        with open(os.path.splitext(path)[0] + ".prom", "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+
+    def summary(self):
+        """
+        A printable end-of-run table.
+        """
+        lines = [f"{'metric':<34} {'count':>8} {'total s':>9} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+        with self.lock:
+            for (name, labels), h in sorted(self.histograms.items()):
+                label = name + "".join(f" {v}" for _, v in labels)
+                lines.append(f"{label:<34} {h.count:>8} {h.sum:>9.2f} {1000 * h.sum / h.count:>9.1f} "
+                             f"{1000 * h.quantile(0.95):>9.1f} {1000 * h.max:>9.1f}")
+            for (name, labels), value in sorted(self.counters.items()):
+                label = name + "".join(f" {v}" for _, v in labels)
+                lines.append(f"{label:<34} {value:>8}")
+            slowest = {kind: sorted(heap, reverse=True) for kind, heap in self.slowest.items()}
+        ratio = self.cache_hit_ratio()
+        if ratio is not None:
+            lines.append(f"cache hit ratio: {ratio:.1%}")
+        for kind, pages in slowest.items():
+            lines.append(f"\nSlowest pages to {kind}:")
+            lines += [f"  {1000 * seconds:>9.1f} ms  {url}" for seconds, url in pages]
+        return "\n".join(lines)
+
+
+METRICS = Metrics()
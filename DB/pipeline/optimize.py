@@ -0,0 +1,256 @@
+"""
+Best-in-slot search over the gear slots and their jewel sockets.
+
+    python -m pipeline.optimize --level 150 --school Fire --maximize Damage:Fire \\
+        --min Resistance:Fire=20 --min Health=3000 --top 5
+
+Finds the builds (one item per slot of GEAR_SLOTS, plus one jewel per
+socket those items bring) with the highest objective that meet every
+minimum. The objective is a weighted sum of stat matrix columns (see
+pipeline.matrix: "Damage:Fire", "Health", ...); items count as the
+calculator adds them up.
+
+Only the objective and the constrained columns matter, so every item is
+reduced to those numbers (plus its socket count). Within a slot, an item
+that at least `top` others beat or match on every number can't be in the
+top builds and is dropped, which leaves a few dozen candidates per slot.
+A depth-first branch and bound then walks the slots, cutting any branch
+whose best possible total (what is chosen so far plus the best each
+remaining slot and socket could add) can't reach the current top-N score
+or a minimum.
+
+Sockets are only counted: the Final files keep how many sockets an item
+has, not their shapes. So only jewels of the gear socket shapes
+(SOCKET_SHAPES) are considered, pin and pet jewels are left out, and any
+of them is assumed to fit any socket; check the shapes of a result
+before wearing it.
+"""
+import argparse
+import heapq
+import itertools
+import time
+from collections import Counter
+
+from pipeline.matrix import COLUMN_INDEX, item_columns
+from pipeline.query import GearDB, item_level
+from pipeline.store import item_school
+
+GEAR_SLOTS = ["Hats", "Robes", "Boots", "Wands", "Athames", "Amulets", "Rings", "Decks"]
+JEWELS = "Jewels"
+# Jewel shapes that go into gear sockets; pins (Sword, Shield, Power) and
+# pet jewels (Star) are left out, as the Final files don't say which
+# items have pin sockets.
+SOCKET_SHAPES = ("Tear", "Circle", "Square", "Triangle")
+
+
+class Candidate:
+    """
+    An item (or None for an empty slot) reduced to the numbers the search uses.
+    """
+
+    def __init__(self, item, vector, sockets=0):
+        self.item = item
+        self.vector = vector
+        self.sockets = sockets
+
+    @property
+    def name(self):
+        return self.item.get("Name", "") if self.item else None
+
+
+def usable(item, level, school, jewel=False):
+    """
+    Whether a wizard of `level` and `school` can use the item: its level
+    is at most `level` ("Any Level" always is), its School Type is "Any" or
+    `school` (jewels without a school fit every school), and no "Wizards
+    Cannot Use" bonus names the school. A jewel must also be of one of
+    SOCKET_SHAPES (jewels without a shape are kept).
+    """
+    item_lvl = item_level(item)
+    if isinstance(item_lvl, int) and item_lvl > level:
+        return False
+    if jewel and item.get("sockets") and item["sockets"][0] not in SOCKET_SHAPES:
+        return False
+    item_sch = (item_school(item) or "").lower()
+    if item_sch not in ("any", school.lower()) and not (jewel and not item_sch):
+        return False
+    for bonus in item.get("bonuses", []):
+        if str(bonus.get("Wizards Cannot Use", "")).lower() == school.lower():
+            return False
+    return True
+
+
+def item_vector(item, weights, minimums):
+    """
+    Return (objective, constrained column values...) for one item.
+    """
+    columns = item_columns(item)
+    objective = sum(columns.get(COLUMN_INDEX[name], 0) * weight for name, weight in weights.items())
+    return (objective,) + tuple(columns.get(COLUMN_INDEX[name], 0) for name in minimums)
+
+
+def dominates(a, b):
+    """
+    Whether candidate `a` is at least as good as `b` on every number.
+    """
+    return a.sockets >= b.sockets and all(x >= y for x, y in zip(a.vector, b.vector))
+
+
+def prune(candidates, top):
+    """
+    Keep the candidates that fewer than `top` others dominate (the top-skyband).
+    Checking each only against the kept ones is enough, since whatever
+    dominates a dropped candidate also dominates everything it dominates.
+    """
+    ordered = sorted(candidates, key=lambda c: (c.vector, c.sockets), reverse=True)
+    kept = []
+    for candidate in ordered:
+        beaten_by = 0
+        for other in kept:
+            if dominates(other, candidate):
+                beaten_by += 1
+                if beaten_by >= top:
+                    break
+        if beaten_by < top:
+            kept.append(candidate)
+    return kept
+
+
+def slot_candidates(items, level, school, weights, minimums, top, jewel=False):
+    candidates = [Candidate(None, (0,) * (1 + len(minimums)))]
+    for item in items:
+        if usable(item, level, school, jewel):
+            sockets = 0 if jewel else (item.get("sockets") or [0])[0]
+            candidates.append(Candidate(item, item_vector(item, weights, minimums), sockets))
+    return prune(candidates, top)
+
+
+def optimize(db, level, school, weights, minimums, top=5, slots=GEAR_SLOTS):
+    """
+    Return up to `top` builds as (objective, totals, gear, jewels), best first:
+    `totals` is {column: value} for the objective's and constrained columns,
+    `gear` is [(slot, item name or None)], `jewels` a list of jewel names.
+    """
+    slot_lists = []
+    for slot in slots:
+        if slot not in db.indexes:
+            print(f"No {slot} data; leaving the slot empty.")
+            continue
+        slot_lists.append((slot, slot_candidates(db.indexes[slot].items, level, school, weights, minimums, top)))
+    jewels = []
+    if JEWELS in db.indexes:
+        jewels = slot_candidates(db.indexes[JEWELS].items, level, school, weights, minimums, top, jewel=True)
+    # Small slots first, best objective first within a slot, so good builds are found early
+    slot_lists.sort(key=lambda entry: len(entry[1]))
+    for _, candidates in slot_lists:
+        candidates.sort(key=lambda c: c.vector[0], reverse=True)
+    jewels.sort(key=lambda c: c.vector[0], reverse=True)
+
+    dims = 1 + len(minimums)
+    floors = [None] + list(minimums.values())
+    # What each remaining slot / each socket could add at most, per number
+    rest_max = [[0.0] * dims for _ in range(len(slot_lists) + 1)]
+    rest_sockets = [0] * (len(slot_lists) + 1)
+    for i in range(len(slot_lists) - 1, -1, -1):
+        candidates = slot_lists[i][1]
+        rest_max[i] = [rest_max[i + 1][d] + max(c.vector[d] for c in candidates) for d in range(dims)]
+        rest_sockets[i] = rest_sockets[i + 1] + max(c.sockets for c in candidates)
+    jewel_max = [max([c.vector[d] for c in jewels] + [0]) for d in range(dims)]
+
+    best = []  # min-heap of (objective, tie-breaker, build)
+    counter = itertools.count()
+
+    def hopeless(vector, extra, sockets):
+        if len(best) == top and vector[0] + extra[0] + sockets * jewel_max[0] <= best[0][0]:
+            return True
+        return any(vector[d] + extra[d] + sockets * jewel_max[d] < floors[d] for d in range(1, dims))
+
+    def add(vector, other):
+        return tuple(x + y for x, y in zip(vector, other))
+
+    def fill_sockets(start, remaining, vector, gear, picked):
+        if hopeless(vector, [0] * dims, remaining):
+            return
+        if remaining == 0 or not jewels:
+            build = (vector, gear, [c.name for c in picked if c.item])
+            if len(best) < top:
+                heapq.heappush(best, (vector[0], next(counter), build))
+            else:
+                heapq.heappushpop(best, (vector[0], next(counter), build))
+            return
+        # Jewels are picked in candidate order, so each multiset is tried once
+        for j in range(start, len(jewels)):
+            fill_sockets(j, remaining - 1, add(vector, jewels[j].vector), gear, picked + [jewels[j]])
+
+    def choose(i, vector, sockets, gear):
+        if hopeless(vector, rest_max[i], sockets + rest_sockets[i]):
+            return
+        if i == len(slot_lists):
+            fill_sockets(0, sockets, vector, gear, [])
+            return
+        slot, candidates = slot_lists[i]
+        for candidate in candidates:
+            choose(i + 1, add(vector, candidate.vector), sockets + candidate.sockets,
+                   gear + [(slot, candidate.name)])
+
+    choose(0, (0,) * dims, 0, [])
+
+    order = {slot: i for i, slot in enumerate(slots)}
+    results = []
+    for objective, _, (vector, gear, picked) in sorted(best, reverse=True):
+        totals = dict(zip(minimums, vector[1:]))
+        gear = sorted(gear, key=lambda entry: order[entry[0]])
+        results.append((objective, totals, gear, picked))
+    return results
+
+
+def parse_pairs(parser, values, default=None):
+    """
+    Parse ["Damage:Fire=2", "Health"] into {"Damage:Fire": 2.0, "Health": default}.
+    Without a `default`, every pair needs a value; bad pairs are reported
+    with parser.error().
+    """
+    pairs = {}
+    for value in values or []:
+        name, _, number = value.partition("=")
+        if name not in COLUMN_INDEX:
+            parser.error(f"unknown stat column '{name}' (see pipeline.matrix.COLUMNS)")
+        if not number and default is None:
+            parser.error(f"'{value}' needs a value, e.g. {name}=100")
+        try:
+            pairs[name] = float(number) if number else default
+        except ValueError:
+            parser.error(f"'{number}' in '{value}' is not a number")
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the best gear builds for an objective.")
+    parser.add_argument("--level", type=int, required=True)
+    parser.add_argument("--school", required=True)
+    parser.add_argument("--maximize", nargs="+", required=True, metavar="COLUMN[=WEIGHT]",
+                        help="stat matrix columns to maximize, e.g. Damage:Fire Critical:Fire=0.05")
+    parser.add_argument("--min", action="append", metavar="COLUMN=VALUE",
+                        help="a minimum total, e.g. Resistance:Fire=20 (repeatable)")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    weights = parse_pairs(parser, args.maximize, default=1.0)
+    minimums = parse_pairs(parser, args.min)
+    start = time.perf_counter()
+    db = GearDB.load(GEAR_SLOTS + [JEWELS])
+    builds = optimize(db, args.level, args.school, weights, minimums, args.top)
+    print(f"{len(builds)} builds in {time.perf_counter() - start:.2f}s")
+    print(f"Socket shapes are not checked: any {'/'.join(SOCKET_SHAPES)} jewel may fill any socket.")
+    for rank, (objective, totals, gear, jewels) in enumerate(builds, 1):
+        limits = ", ".join(f"{name} {value:g}" for name, value in totals.items())
+        print(f"\n#{rank}  objective {objective:g}" + (f"  ({limits})" if limits else ""))
+        for slot, name in gear:
+            print(f"  {slot:<8} {name or '-'}")
+        if jewels:
+            counts = Counter(jewels)
+            print("  Jewels   " + ", ".join(f"{n} x {name}" for name, n in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
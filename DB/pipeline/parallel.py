@@ -0,0 +1,29 @@
+"""
+Bounded, order-preserving map over an executor.
+
+Used by the fetch stage (thread pool) and the parse stage (process pool):
+at most `window` calls are in flight or finished-but-unconsumed at any
+time, so a slow consumer applies back-pressure instead of letting pages
+or records pile up in memory.
+"""
+from collections import deque
+
+
+def ordered_map(pool, fn, arg_tuples, window):
+    """
+    Call fn(*args) on `pool` for each tuple in `arg_tuples` and yield
+    (args, result) pairs in input order.
+    """
+    pending = deque()
+    arg_iter = iter(arg_tuples)
+    for args in arg_iter:
+        pending.append((args, pool.submit(fn, *args)))
+        if len(pending) >= window:
+            break
+    while pending:
+        args, future = pending.popleft()
+        result = future.result()
+        next_args = next(arg_iter, None)
+        if next_args is not None:
+            pending.append((next_args, pool.submit(fn, *next_args)))
+        yield args, result
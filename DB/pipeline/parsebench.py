@@ -0,0 +1,91 @@
+"""
+Compare the RAW parsing modes with the original extractor on a recorded page corpus.
+
+    python -m pipeline.parsebench ./corpus --category Wands
+
+Parses every page in the corpus (see pipeline.standin) with the original
+scripts' extractor (pipeline.rawreference), the default mode and the fast
+mode, reports the mean parse time per page for each, and lists any page
+whose default or fast RAW record differs from the original one. A mode
+should only be used for a category once this reports no differences on
+its corpus. DB/tests/corpus holds a small corpus per parser that the
+tests check the same way.
+"""
+import argparse
+import json
+import os
+import time
+from urllib.parse import unquote, urlsplit
+
+from pipeline.profiles import get_profile
+from pipeline.raw import extract_item, pending_items
+from pipeline.rawreference import reference_extract_item
+from pipeline.standin import corpus_filename, corpus_urls
+
+
+def corpus_pages(corpus_dir):
+    """
+    Yield (title, url, html) for every page in a corpus folder.
+    """
+    for url in corpus_urls(corpus_dir):
+        title = unquote(urlsplit(url).path.rsplit("/", 1)[-1]).replace("_", " ")
+        with open(os.path.join(corpus_dir, corpus_filename(url)), "r", encoding="utf-8") as f:
+            yield title, url, f.read()
+
+
+def parse_modes(html, url, item_title, profile):
+    """
+    Return {mode: (RAW record as the RAW file writes it, seconds)} for the
+    original extractor and both modes.
+    """
+    parsers = {
+        "original": lambda: reference_extract_item(html, url, item_title, profile),
+        "default": lambda: extract_item(html, url, item_title, profile, False),
+        "fast": lambda: extract_item(html, url, item_title, profile, True),
+    }
+    results = {}
+    for mode, parse in parsers.items():
+        start = time.perf_counter()
+        record = parse()
+        elapsed = time.perf_counter() - start
+        results[mode] = (json.dumps(record, indent=2, ensure_ascii=False), elapsed)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RAW parsing modes against the original extractor.")
+    parser.add_argument("corpus_dir")
+    parser.add_argument("-c", "--category", required=True)
+    args = parser.parse_args()
+    profile = get_profile(args.category)
+
+    timings = {"original": 0.0, "default": 0.0, "fast": 0.0}
+    mismatches = {"default": [], "fast": []}
+    count = 0
+    for title, url, html in corpus_pages(args.corpus_dir):
+        # Apply the same title clean-up as the RAW stage
+        item_title = pending_items([{"title": title, "url": url}])[0][0]
+        results = parse_modes(html, url, item_title, profile)
+        for mode, (_, elapsed) in results.items():
+            timings[mode] += elapsed
+        for mode in mismatches:
+            if results[mode][0] != results["original"][0]:
+                mismatches[mode].append(url)
+        count += 1
+
+    if not count:
+        print("No pages found in", args.corpus_dir)
+        return
+    original_ms = timings["original"] / count * 1000
+    print(f"pages: {count}")
+    print(f"original parse: {original_ms:.2f} ms/page")
+    for mode in mismatches:
+        ms = timings[mode] / count * 1000
+        print(f"{mode + ' parse:':<15} {ms:.2f} ms/page ({original_ms / ms:.2f}x), "
+              f"records differing from the original: {len(mismatches[mode])}")
+        for url in mismatches[mode]:
+            print("  ", url)
+
+
+if __name__ == "__main__":
+    main()
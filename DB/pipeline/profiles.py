@@ -0,0 +1,64 @@
+"""
+Per-category settings for the extraction pipeline.
+
+Each DB/<Category>/ folder used to carry its own copy of the URL, RAW and
+Final scripts. The only real differences between those copies are kept
+here, one Profile per category.
+"""
+import os
+from collections import namedtuple
+
+# Root of the DB folder (the parent of this package)
+DB_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name:           folder and file name stem, e.g. "Wands" -> Wands/Wands_Data/Wands_Data.json
+# listing_page:   wiki category page the URL stage starts from
+# raw_parser:     "standard" item infobox, or "jewel" (Jewel Information table, with standard fallback)
+# final_rules:    "gear", "wand" (dedup-icon rule) or "jewel"
+# strip_words:    words removed from bonus text in the Final stage
+Profile = namedtuple("Profile", ["name", "listing_page", "raw_parser", "final_rules", "strip_words"])
+
+PROFILES = {
+    "Amulets": Profile("Amulets", "/wiki/Category:Amulets", "standard", "gear", ("Max",)),
+    "Athames": Profile("Athames", "/wiki/Category:Athames", "standard", "gear", ("Max",)),
+    "Boots": Profile("Boots", "/wiki/Category:Boots", "standard", "gear", ("Max",)),
+    "Decks": Profile("Decks", "/wiki/Category:Decks", "standard", "gear", ("Max",)),
+    "Hats": Profile("Hats", "/wiki/Category:Hats", "standard", "gear", ("Max",)),
+    "Jewels": Profile("Jewels", "/wiki/Category:Jewels", "jewel", "jewel", ("Max", "Chance", "Rating")),
+    "Rings": Profile("Rings", "/wiki/Category:Rings", "standard", "gear", ("Max",)),
+    "Robes": Profile("Robes", "/wiki/Category:Robes", "standard", "gear", ("Max",)),
+    "Wands": Profile("Wands", "/wiki/Category:Wands", "standard", "wand", ("Max", "Rating")),
+}
+
+
+def get_profile(name):
+    """
+    Look up a category profile by name (case-insensitive).
+    """
+    for key, profile in PROFILES.items():
+        if key.lower() == name.lower():
+            return profile
+    raise KeyError(f"Unknown category '{name}'. Known categories: {', '.join(PROFILES)}")
+
+
+def data_dir(profile):
+    """
+    Return the <Category>_Data folder for a profile.
+    """
+    return os.path.join(DB_DIR, profile.name, f"{profile.name}_Data")
+
+
+def url_file(profile):
+    return os.path.join(data_dir(profile), f"{profile.name}_URL.json")
+
+
+def raw_file(profile):
+    return os.path.join(data_dir(profile), f"RAW_{profile.name}_Data.json")
+
+
+def journal_file(profile):
+    return os.path.join(data_dir(profile), f"RAW_{profile.name}_Data.journal.jsonl")
+
+
+def final_file(profile):
+    return os.path.join(data_dir(profile), f"{profile.name}_Data.json")
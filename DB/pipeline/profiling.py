@@ -0,0 +1,108 @@
+"""
+Opt-in profiling of the pipeline stages.
+
+    python -m pipeline raw final -c Jewels --profile             # into DB/.profile
+    python -m pipeline raw -c Wands --profile /tmp/prof --slowest 50
+
+Each stage of each category runs under cProfile and, at the same time, a
+stack sampler that looks at the stage's thread every few milliseconds.
+For a stage named e.g. "raw-Jewels" the profile folder then holds:
+
+    raw-Jewels.prof        cProfile stats: python -m pstats, snakeviz, ...
+    raw-Jewels.collapsed   sampled stacks, one "outer;...;inner count" line
+                           each: flamegraph.pl, speedscope, ...
+
+and, once the run is done, slowest_parse.tsv lists the --slowest item
+pages that took longest to parse, with their parse time.
+
+Only the thread running the stage is profiled: that is where pages are
+parsed and items transformed and serialized, but not where pages are
+fetched (see the fetch metrics instead). Parsing on --parse-workers moves
+it out of the profiled process, so profile the RAW stage without them.
+"""
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from pipeline.profiles import DB_DIR
+
+DEFAULT_PROFILE_DIR = os.path.join(DB_DIR, ".profile")
+SAMPLE_INTERVAL = 0.005
+
+
+def frame_label(code):
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """
+    Counts the call stacks of one thread, sampled every `interval` seconds.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class StageProfiler:
+    """
+    Writes a cProfile dump and collapsed stacks for every stage it wraps.
+    """
+
+    def __init__(self, directory=DEFAULT_PROFILE_DIR, interval=SAMPLE_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name):
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        profiler = cProfile.Profile()
+        sampler.start()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            sampler.stop()
+            path = os.path.join(self.directory, name)
+            profiler.dump_stats(path + ".prof")
+            sampler.write(path + ".collapsed")
+            print(f"Profile of {name} written to '{path}.prof' and '{path}.collapsed'")
+
+    def write_slowest(self, pages):
+        """
+        Write the slowest pages to parse, as metrics.Metrics.slowest_pages() returns them.
+        """
+        path = os.path.join(self.directory, "slowest_parse.tsv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("seconds\turl\n")
+            for seconds, url in pages:
+                f.write(f"{seconds:.6f}\t{url}\n")
+        print(f"Slowest pages to parse written to '{path}'")
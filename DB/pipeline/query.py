@@ -0,0 +1,211 @@
+"""
+In-memory query API over the Final <Category>_Data.json datasets.
+
+Loads each category once and builds per-field indexes, so filtering and
+top-k sorting no longer scan the whole list:
+
+    from pipeline.query import GearDB, level_bracket
+
+    db = GearDB.load()
+    db.query("Amulets", level_range=level_bracket(155), school="Fire",
+             min_bonuses={"Damage": 15}, sort_by="Damage", limit=10)
+
+The filters follow the calculator's (Script.js): an item with "Any Level"
+is in every level range, a "School Type" of "Any" matches every school,
+and a bonus value is the number in the first bonus with that stat
+(getBonusValue), 0 when the item has none. Jewels are filed under their
+first school. See pipeline.querybench for timings against a plain scan.
+"""
+import heapq
+import json
+import os
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from pipeline.profiles import PROFILES, final_file, get_profile
+from pipeline.stats import parse_level, parse_value
+from pipeline.store import item_school
+
+# Level brackets of the calculator's getLevelBracket()
+LEVEL_BRACKETS = [(1, 29), (30, 59), (60, 99), (100, 129), (130, 159), (160, 170)]
+
+
+def level_bracket(level):
+    """
+    Return the (min, max) level bracket containing `level`, or None.
+    """
+    for low, high in LEVEL_BRACKETS:
+        if low <= level <= high:
+            return low, high
+    return None
+
+
+def item_level(item):
+    """
+    Return "any" for an "Any Level" item, the number in "150+", or None.
+    """
+    return parse_level(item.get("level"))
+
+
+def bonus_value(item, stat):
+    """
+    Numeric value of the first bonus with key `stat` (the first school's
+    value for a per-school bonus), or 0.
+    """
+    for bonus in item.get("bonuses", []):
+        if stat in bonus:
+            value = bonus[stat]
+            if isinstance(value, dict):
+                value = next(iter(value.values()), "")
+            number = parse_value(value)
+            return float(number) if number is not None else 0
+    return 0
+
+
+class CategoryIndex:
+    """
+    One category's items with indexes on level, school, status, trade
+    flags and every bonus stat.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self.names = [item.get("Name", "") for item in items]
+
+        levels = []
+        self.any_level = set()
+        self.schools = defaultdict(set)
+        self.statuses = defaultdict(set)
+        self.tradeable = set()
+        self.no_auction = set()
+        values = defaultdict(dict)  # stat -> {item id: value}
+        for i, item in enumerate(items):
+            level = item_level(item)
+            if level == "any":
+                self.any_level.add(i)
+            elif level is not None:
+                levels.append((level, i))
+            school = item_school(item)
+            if school:
+                self.schools[school.lower().strip()].add(i)
+            self.statuses[item.get("status", "").lower()].add(i)
+            if item.get("tradeable"):
+                self.tradeable.add(i)
+            if item.get("no_auction"):
+                self.no_auction.add(i)
+            for bonus in item.get("bonuses", []):
+                for stat in bonus:
+                    if i not in values[stat]:
+                        values[stat][i] = bonus_value(item, stat)
+
+        self.all_ids = set(range(len(items)))
+        self.not_tradeable = self.all_ids - self.tradeable
+        self.auctionable = self.all_ids - self.no_auction
+
+        levels.sort()
+        self.level_keys = [level for level, _ in levels]
+        self.level_ids = [i for _, i in levels]
+
+        # Per stat: the nonzero values in ascending order with their item ids
+        self.bonus_values = {}
+        self.bonus_keys = {}
+        self.bonus_ids = {}
+        for stat, by_id in values.items():
+            ranked = sorted((value, i) for i, value in by_id.items() if value)
+            self.bonus_values[stat] = by_id
+            self.bonus_keys[stat] = [value for value, _ in ranked]
+            self.bonus_ids[stat] = [i for _, i in ranked]
+
+    def in_level_range(self, low, high):
+        start = bisect_left(self.level_keys, low)
+        end = bisect_right(self.level_keys, high)
+        return self.any_level.union(self.level_ids[start:end])
+
+    def with_school(self, school):
+        school = school.lower().strip()
+        return self.schools.get(school, set()) | self.schools.get("any", set())
+
+    def with_bonus_at_least(self, stat, threshold):
+        keys = self.bonus_keys.get(stat, [])
+        ids = self.bonus_ids.get(stat, [])
+        if threshold > 0:
+            return set(ids[bisect_left(keys, threshold):])
+        # Items without the bonus count as 0, so only drop those below the threshold
+        return self.all_ids.difference(ids[:bisect_left(keys, threshold)])
+
+    def value(self, i, stat):
+        return self.bonus_values.get(stat, {}).get(i, 0)
+
+
+class GearDB:
+    """
+    The Final datasets of several categories, indexed for query().
+    """
+
+    def __init__(self, datasets):
+        self.indexes = {name: CategoryIndex(items) for name, items in datasets.items()}
+
+    @classmethod
+    def load(cls, categories=None):
+        """
+        Load <Category>_Data.json for the given categories (default: every
+        category that has one).
+        """
+        profiles = [get_profile(name) for name in categories] if categories else PROFILES.values()
+        datasets = {}
+        for profile in profiles:
+            if not os.path.exists(final_file(profile)):
+                continue
+            with open(final_file(profile), "r", encoding="utf-8") as f:
+                datasets[profile.name] = json.load(f)
+        return cls(datasets)
+
+    def index(self, category):
+        return self.indexes[get_profile(category).name]
+
+    def query(self, category, level_range=None, school=None, status=None,
+              tradeable=None, no_auction=None, min_bonuses=None, sort_by=None, limit=None):
+        """
+        Return the items of `category` matching every given filter:
+
+        level_range:  (min, max) levels, e.g. level_bracket(155)
+        school:       school name; "Any" items always match
+        status:       "Active" or "Retired"
+        tradeable, no_auction:  True or False
+        min_bonuses:  {stat: minimum value}, e.g. {"Damage": 15}
+
+        Results are in dataset order, or with `sort_by` a stat name, highest
+        value first (ties by name), or "name". `limit` keeps the first N.
+        """
+        index = self.index(category)
+        candidates = []
+        if level_range is not None:
+            candidates.append(index.in_level_range(*level_range))
+        if school is not None:
+            candidates.append(index.with_school(school))
+        if status is not None:
+            candidates.append(index.statuses.get(status.lower(), set()))
+        if tradeable is not None:
+            candidates.append(index.tradeable if tradeable else index.not_tradeable)
+        if no_auction is not None:
+            candidates.append(index.no_auction if no_auction else index.auctionable)
+        for stat, threshold in (min_bonuses or {}).items():
+            candidates.append(index.with_bonus_at_least(stat, threshold))
+
+        if candidates:
+            candidates.sort(key=len)
+            ids = candidates[0].intersection(*candidates[1:])
+        else:
+            ids = range(len(index.items))
+
+        if sort_by == "name":
+            ids = sorted(ids, key=lambda i: index.names[i])
+        elif sort_by is not None:
+            def key(i):
+                return -index.value(i, sort_by), index.names[i]
+            ids = heapq.nsmallest(limit, ids, key=key) if limit is not None else sorted(ids, key=key)
+        else:
+            ids = sorted(ids)
+        if limit is not None:
+            ids = ids[:limit]
+        return [index.items[i] for i in ids]
@@ -0,0 +1,89 @@
+"""
+Time indexed GearDB queries against a plain scan of the item list.
+
+    python -m pipeline.querybench
+    python -m pipeline.querybench -c Amulets Rings --repeat 500
+
+Runs a set of typical calculator queries on every loaded category both
+ways, checks that they return the same items, and prints the mean time
+per query. The scan is the filter/sort code of Script.js written out in
+Python.
+"""
+import argparse
+import time
+
+from pipeline.query import GearDB, bonus_value, item_level, level_bracket
+from pipeline.store import item_school
+
+QUERIES = [
+    {"level_range": level_bracket(155), "school": "Fire"},
+    {"level_range": level_bracket(170), "status": "Active", "sort_by": "Damage", "limit": 10},
+    {"school": "Storm", "min_bonuses": {"Damage": 10}, "sort_by": "Damage", "limit": 5},
+    {"level_range": level_bracket(140), "tradeable": True, "min_bonuses": {"Resistance": 5}},
+    {"status": "Retired", "no_auction": False, "sort_by": "Health", "limit": 20},
+    {"min_bonuses": {"Health": 500, "Critical": 50}},
+]
+
+
+def scan_query(items, level_range=None, school=None, status=None,
+               tradeable=None, no_auction=None, min_bonuses=None, sort_by=None, limit=None):
+    """
+    GearDB.query() as a filter over the whole list.
+    """
+    results = []
+    for item in items:
+        if level_range is not None:
+            level = item_level(item)
+            if level != "any" and (level is None or not level_range[0] <= level <= level_range[1]):
+                continue
+        if school is not None:
+            item_schools = (item_school(item) or "").lower().strip()
+            if item_schools not in ("any", school.lower()):
+                continue
+        if status is not None and item.get("status", "").lower() != status.lower():
+            continue
+        if tradeable is not None and bool(item.get("tradeable")) != tradeable:
+            continue
+        if no_auction is not None and bool(item.get("no_auction")) != no_auction:
+            continue
+        if any(bonus_value(item, stat) < threshold for stat, threshold in (min_bonuses or {}).items()):
+            continue
+        results.append(item)
+    if sort_by == "name":
+        results.sort(key=lambda item: item.get("Name", ""))
+    elif sort_by is not None:
+        results.sort(key=lambda item: (-bonus_value(item, sort_by), item.get("Name", "")))
+    return results[:limit] if limit is not None else results
+
+
+def mean_seconds(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark indexed queries against a list scan.")
+    parser.add_argument("-c", "--category", nargs="+", help="categories to load (default: all)")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = GearDB.load(args.category)
+    print(f"loaded and indexed {sum(len(i.items) for i in db.indexes.values())} items "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    for category, index in db.indexes.items():
+        for query in QUERIES:
+            indexed = db.query(category, **query)
+            scanned = scan_query(index.items, **query)
+            same = "same" if [item["url"] for item in indexed] == [item["url"] for item in scanned] else "DIFFERENT"
+            indexed_us = mean_seconds(lambda: db.query(category, **query), args.repeat) * 1e6
+            scan_us = mean_seconds(lambda: scan_query(index.items, **query), max(args.repeat // 20, 1)) * 1e6
+            print(f"{category:<8} {len(indexed):>5} results  indexed {indexed_us:8.1f} us  "
+                  f"scan {scan_us:9.1f} us  ({scan_us / indexed_us:6.1f}x, {same})  {query}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""
+RAW stage: extract infobox fields from each item page.
+
+Reads <Category>_URL.json, fetches every item page and writes
+RAW_<Category>_Data.json with the level, bonuses (with icon order),
+sockets, trade flags, status and category links of each item.
+
+Parsing can run on a process pool (--parse-workers) fed by the fetch
+stage, so it is not limited to one core by the GIL. Records go through
+a checkpoint journal (see pipeline.checkpoint), so an
+interrupted run can be continued with --resume. Pages can be kept in, and
+re-parsed from, a per-category archive (see pipeline.archive).
+"""
+import json
+import os
+import re
+import time
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from pipeline.archive import DEFAULT_ARCHIVE_DIR, PageArchive, archive_file, archive_pages, read_pages
+from pipeline.checkpoint import DEFAULT_FLUSH_EVERY, Journal
+from pipeline.fetch import fetch_pages
+from pipeline.jsonio import iter_array
+from pipeline.metrics import METRICS
+from pipeline.parallel import ordered_map
+from pipeline.profiles import data_dir, journal_file, raw_file, url_file
+
+RETIRED_TEXT = "This item has been retired. Wizards can no longer acquire this item."
+CATEGORY_HREF = re.compile(r"^/wiki/Category:")
+
+# Infobox labels, matched against the text of <b> tags in a single scan
+INFOBOX_LABELS = ("Jewel Information", "Level Required:", "Bonuses:", "Sockets", "Tradeable", "No Auction")
+
+# With fast parsing only these elements (and everything inside them) are
+# built into the tree: the infobox and category tables, the bonus/socket
+# lists, the retired notice and category links.
+PARSE_ONLY = SoupStrainer(["table", "td", "dl", "b", "a"])
+PROGRESS_EVERY = 100
+
+
+def pending_items(items):
+    """
+    Return (title, url) pairs for the entries of a <Category>_URL.json,
+    skipping navigation links and entries without a URL.
+    """
+    pending = []
+    for index, item in enumerate(items):
+        item_title = item.get("title", f"item_{index+1}")
+
+        # Exclude items with title "previous page"
+        if item_title.strip().lower() == "previous page":
+            print(f"Skipping item '{item_title}' as it is a navigation link.")
+            continue
+
+        # Remove "Item:" prefix if present
+        if item_title.startswith("Item:"):
+            item_title = item_title[len("Item:"):].strip()
+
+        item_url = item.get("url")
+        if not item_url:
+            print(f"No URL found for {item_title}. Skipping...")
+            continue
+
+        pending.append((item_title, item_url))
+    return pending
+
+
+def find_labels(info_box):
+    """
+    Scan the <b> tags of an infobox once and return the first tag whose
+    text contains each of INFOBOX_LABELS, as find("b", string=...) would.
+    """
+    labels = {}
+    for b in info_box.find_all("b"):
+        text = b.string
+        if not text:
+            continue
+        for label in INFOBOX_LABELS:
+            if label not in labels and label in text:
+                labels[label] = b
+    return labels
+
+
+def extract_standard_fields(info_box, extracted, labels):
+    """
+    Fill level_required, bonuses, sockets, tradeable and no_auction
+    from a regular gear infobox.
+    """
+    # --- Extract Level Required ---
+    level_tag = labels.get("Level Required:")
+    if level_tag and level_tag.parent:
+        level_text = level_tag.parent.get_text(strip=True)
+        extracted["level_required"] = level_text.replace("Level Required:", "").strip()
+
+    # --- Extract Bonuses (preserving icon order) ---
+    bonuses = []
+    bonuses_tag = labels.get("Bonuses:")
+    if bonuses_tag:
+        dl_tag = bonuses_tag.find_next("dl")
+        if dl_tag:
+            for dd in dl_tag.find_all("dd"):
+                bonus_text = dd.get_text(" ", strip=True)
+                icons = []
+                for img in dd.find_all("img"):
+                    alt_text = img.get("alt", "")
+                    if alt_text.startswith("(Icon)"):
+                        icon_name = alt_text.replace("(Icon)", "").strip()
+                        if icon_name.lower().endswith(".png"):
+                            icon_name = icon_name[:-4].strip()
+                        icons.append(icon_name)
+                bonuses.append({"bonus": bonus_text, "icons": icons})
+    extracted["bonuses"] = bonuses
+
+    # --- Extract Sockets ---
+    sockets = []
+    sockets_tag = labels.get("Sockets")
+    if sockets_tag:
+        parent_dl = sockets_tag.find_parent("dl")
+        if parent_dl:
+            sockets_info_dl = parent_dl.find_next_sibling("dl")
+            if sockets_info_dl:
+                for dd in sockets_info_dl.find_all("dd"):
+                    img = dd.find("img")
+                    if img and img.get("title"):
+                        sockets.append(img.get("title"))
+                    else:
+                        text = dd.get_text(" ", strip=True)
+                        if text:
+                            sockets.append(text)
+    extracted["sockets"] = sockets
+
+    # --- Extract Tradeable and Auction flags ---
+    extracted["tradeable"] = "Tradeable" in labels
+    extracted["no_auction"] = "No Auction" in labels
+
+
+def extract_jewel_fields(info_box, extracted):
+    """
+    Fill the fields of a "Jewel Information" infobox: one two-cell row
+    per field (level, socket, type, school, weaving school, effect).
+    """
+    additional_info = {}
+    for row in info_box.find_all("tr"):
+        cells = row.find_all("td")
+        if len(cells) != 2:
+            continue  # Skip headers or rows without exactly 2 cells
+
+        field_tag = cells[0].find("b")
+        if not field_tag:
+            continue
+        # Normalize field name: lowercase and remove any trailing colon
+        field_name = field_tag.get_text(strip=True).lower().rstrip(":")
+        value_cell = cells[1]
+
+        if field_name == "level":
+            # Extract level data
+            level_text = value_cell.get_text(" ", strip=True)
+            if level_text:
+                extracted["level_required"] = level_text
+
+        elif field_name == "socket":
+            sockets = []
+            socket_text = value_cell.get_text(" ", strip=True)
+            if socket_text:
+                sockets.append(socket_text)
+            # Append any icon titles if available
+            for img in value_cell.find_all("img"):
+                title = img.get("title")
+                if title:
+                    sockets.append(title.strip())
+            extracted["sockets"] = sockets
+
+        elif field_name in ("type", "school", "weaving school"):
+            key_name = field_name.replace(" ", "_")  # e.g., "weaving_school"
+            values = []
+            text_val = value_cell.get_text(" ", strip=True)
+            if text_val:
+                values.append(text_val)
+            for img in value_cell.find_all("img"):
+                icon = img.get("title") or img.get("alt", "")
+                if icon:
+                    values.append(icon.strip())
+            extracted[key_name] = values
+
+        elif field_name == "effect":
+            # Extract Effect data as bonuses
+            bonuses = []
+            # The effect cell may contain multiple lines separated by <br>
+            bonus_html = value_cell.decode_contents().strip()
+            bonus_lines = [line.strip() for line in bonus_html.split("<br>") if line.strip()]
+            for line in bonus_lines:
+                line_soup = BeautifulSoup(line, "html.parser")
+                bonus_text = line_soup.get_text(" ", strip=True)
+                icons = [img.get("alt", "").strip() for img in line_soup.find_all("img") if img.get("alt")]
+                bonuses.append({"bonus": bonus_text, "icons": icons})
+            extracted["bonuses"] = bonuses
+
+        else:
+            # For any additional field, preserve the full text in an "additional_info" dictionary.
+            additional_info[field_name] = value_cell.get_text(" ", strip=True)
+    if additional_info:
+        extracted["additional_info"] = additional_info
+
+
+def extract_item(html, item_url, item_title, profile, fast=False):
+    """
+    Parse one item page and return its RAW record. With `fast`, only the
+    elements in PARSE_ONLY are built into the tree.
+    """
+    soup = BeautifulSoup(html, "html.parser", parse_only=PARSE_ONLY if fast else None)
+    extracted = {"url": item_url, "title": item_title}
+
+    # Locate the info box table (assumed as the table with width="300")
+    info_box = soup.find("table", attrs={"width": "300"})
+    if profile.raw_parser == "jewel" and not info_box:
+        info_box = soup.find("table", class_="infobox")
+
+    if info_box:
+        labels = find_labels(info_box)
+        # Jewel pages either have "Jewel Information" or a title starting with "Jewel:"
+        if profile.raw_parser == "jewel" and (
+            "Jewel Information" in labels or item_title.lower().startswith("jewel:")
+        ):
+            extract_jewel_fields(info_box, extracted)
+        else:
+            extract_standard_fields(info_box, extracted, labels)
+    else:
+        print(f"Info box not found for item: {item_title}")
+
+    # --- Extract Status ---
+    # Check for the retired notice in the page and set status accordingly.
+    # Most pages don't mention it at all, so check the raw HTML before searching the tree.
+    if RETIRED_TEXT in html and soup.find("b", string=lambda t: t and RETIRED_TEXT in t):
+        extracted["status"] = "Retired"
+    else:
+        extracted["status"] = "Active"
+
+    # --- Extract Category ---
+    category_links = []
+    if profile.raw_parser == "jewel":
+        # Capture every category link and remove the prefix "/wiki/Category:".
+        for a in soup.find_all("a", href=CATEGORY_HREF):
+            category_links.append(a["href"][len("/wiki/Category:"):])
+    else:
+        # Search through <td> elements for <a> tags with category links.
+        for td in soup.find_all("td"):
+            a_tag = td.find("a", href=CATEGORY_HREF)
+            if a_tag:
+                category_links.append(a_tag["href"])
+    extracted["category"] = category_links
+
+    return extracted
+
+
+def timed_extract_item(*args):
+    """
+    extract_item() that also returns the seconds it took, measured where it
+    runs (a parse worker process cannot record into METRICS itself).
+    """
+    start = time.perf_counter()
+    record = extract_item(*args)
+    return record, time.perf_counter() - start
+
+
+def extract_pages(pages, todo, profile, fast=False, parse_pool=None, parse_workers=0):
+    """
+    Parse fetched pages into RAW records, yielding them in `todo` order.
+    `pages` yields (url, html) for each (title, url) in `todo`. With a
+    `parse_pool`, pages are parsed on it with at most 4 per worker queued.
+    """
+    page_args = (
+        (html, item_url, item_title, profile, fast)
+        for (item_title, item_url), (_, html) in zip(todo, pages)
+    )
+    if parse_pool is None:
+        parsed = (timed_extract_item(*args) for args in page_args)
+    else:
+        parsed = (result for _, result in
+                  ordered_map(parse_pool, timed_extract_item, page_args, parse_workers * 4))
+    for count, (record, seconds) in enumerate(parsed, 1):
+        METRICS.page("parse", record["url"], seconds)
+        if count % PROGRESS_EVERY == 0 or count == len(todo):
+            print(f"Parsed {count}/{len(todo)} {profile.name} pages")
+        yield record
+
+
+def carry_over(raw_filename, urls, journal):
+    """
+    Journal the records of `urls` from an existing RAW file unchanged, so
+    a rebuild from an incomplete archive keeps what the last run had.
+    Returns how many were found.
+    """
+    if not os.path.exists(raw_filename):
+        return 0
+    kept = 0
+    with open(raw_filename, "r", encoding="utf-8") as f:
+        for record in iter_array(f):
+            if record.get("url") in urls:
+                journal.append(record)
+                kept += 1
+    return kept
+
+
+def run_raw(profile, scraper, workers, base_url=None, pool=None,
+            resume=False, flush_every=DEFAULT_FLUSH_EVERY, fast=False,
+            parse_pool=None, parse_workers=0, archive_dir=None, from_archive=False):
+    """
+    Run the RAW stage for one category. With `resume`, items already in
+    the checkpoint journal from an interrupted run are not fetched again.
+    With `archive_dir`, fetched pages are stored in the category's archive;
+    with `from_archive` as well, pages are read from it (DB/.archive unless
+    `archive_dir` says otherwise) and nothing is fetched: the archive must
+    exist, and items it lacks keep their record from the current RAW file.
+    """
+    if from_archive and not archive_dir:
+        archive_dir = DEFAULT_ARCHIVE_DIR
+    input_filename = url_file(profile)
+    with open(input_filename, "r", encoding="utf-8") as f:
+        items = json.load(f)
+
+    if not items:
+        print("No items found in", input_filename)
+        return
+
+    # Opened first, so a missing archive fails before anything is written
+    archive = PageArchive(archive_file(profile, archive_dir), readonly=from_archive) if archive_dir else None
+    os.makedirs(data_dir(profile), exist_ok=True)
+    journal = Journal(journal_file(profile), resume, flush_every)
+
+    pending = pending_items(items)
+    todo = [(item_title, item_url) for item_title, item_url in pending if item_url not in journal.done_urls]
+    if len(todo) < len(pending):
+        print(f"Resuming: {len(pending) - len(todo)} items already extracted, {len(todo)} to go.")
+
+    if from_archive:
+        archived_urls = archive.urls()
+        missing = {item_url for _, item_url in todo if item_url not in archived_urls}
+        if missing:
+            kept = carry_over(raw_file(profile), missing, journal)
+            print(f"{len(missing)} items are not in the archive: {kept} kept from the current RAW file, "
+                  f"{len(missing) - kept} left out.")
+        todo = [(item_title, item_url) for item_title, item_url in todo if item_url in archived_urls]
+
+    item_urls = [item_url for _, item_url in todo]
+    if from_archive:
+        pages = read_pages(archive, item_urls)
+    else:
+        pages = fetch_pages(scraper, item_urls, workers, base_url, pool)
+        if archive:
+            pages = archive_pages(pages, archive)
+    for record in extract_pages(pages, todo, profile, fast, parse_pool, parse_workers):
+        journal.append(record)
+    journal.close()
+    if archive:
+        archive.close()
+
+    # Save the combined extracted data into a single JSON file
+    output_filename = raw_file(profile)
+    journal.compact([item_url for _, item_url in pending], output_filename)
+    print(f"\nCombined extracted info saved to '{output_filename}'")
@@ -0,0 +1,193 @@
+"""
+Request scheduling for the shared wiki session.
+
+RequestScheduler wraps the cloudscraper session and is what every stage
+actually calls get() on (below the page cache, so cache hits cost
+nothing). Each request:
+
+- waits for a token from a TokenBucket, capping the sustained request rate;
+- waits for a slot from an AdaptiveLimit, which caps how many requests are
+  in flight and adjusts that cap as it goes: one more slot after a run of
+  fast successes, half as many after a throttle, server error or a
+  response much slower than usual;
+- gives up on a connection after `timeout` (connect, read) seconds, so a
+  stalled connection doesn't hold its worker (and, as pages are handed
+  on in order, the whole category) forever;
+- is retried on 429/5xx, connection errors and timeouts with jittered
+  exponential backoff (or the server's Retry-After), up to `max_retries` times.
+
+A page that still fails after the last retry, or that answers with any
+other status outside 2xx and 304 (403, 404, ...), raises FetchError
+instead of being parsed as an empty page; rerun the stage with --resume
+to continue.
+"""
+import random
+import threading
+import time
+
+import requests
+
+from pipeline.metrics import METRICS
+
+DEFAULT_RATE = 20.0
+DEFAULT_MAX_RETRIES = 5
+# (connect, read) seconds; requests itself never times out
+DEFAULT_TIMEOUT = (10.0, 60.0)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """A page could not be fetched after all retries."""
+
+
+class TokenBucket:
+    """
+    Allows `rate` acquisitions per second on average, in bursts of up to `burst`.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimit:
+    """
+    Concurrency cap that grows by one slot after `limit` consecutive fast
+    successes and halves on errors or slow responses (at most once per
+    `cooldown` seconds, so one burst of failures counts once).
+    """
+
+    def __init__(self, maximum, minimum=1, slow_factor=3.0, cooldown=1.0):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = maximum
+        self.slow_factor = slow_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.successes = 0
+        self.baseline = None  # fastest smoothed latency seen so far
+        self.smoothed = None
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def on_success(self, latency):
+        with self.condition:
+            self.smoothed = latency if self.smoothed is None else 0.8 * self.smoothed + 0.2 * latency
+            self.baseline = self.smoothed if self.baseline is None else min(self.baseline, self.smoothed)
+            if self.smoothed > self.slow_factor * self.baseline:
+                self._decrease()
+                return
+            self.successes += 1
+            if self.successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self.successes = 0
+                self.condition.notify()
+
+    def on_failure(self):
+        with self.condition:
+            self._decrease()
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self.last_decrease < self.cooldown:
+            return
+        self.last_decrease = now
+        self.limit = max(self.minimum, self.limit // 2)
+        self.successes = 0
+
+
+class RequestScheduler:
+    """
+    Rate-limited, retrying, adaptively concurrent wrapper around a session.
+    """
+
+    def __init__(self, session, workers, rate=DEFAULT_RATE, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=1.0, backoff_max=60.0, timeout=DEFAULT_TIMEOUT):
+        self.session = session
+        self.bucket = TokenBucket(rate)
+        self.limit = AdaptiveLimit(workers)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    def backoff(self, attempt, response=None):
+        """
+        Seconds to wait before retry number `attempt` (1-based): the
+        server's Retry-After if it sent one, otherwise full-jitter
+        exponential backoff.
+        """
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            self.limit.acquire()
+            response = None
+            start = time.monotonic()
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            else:
+                error = None
+            finally:
+                self.limit.release()
+
+            latency = time.monotonic() - start
+            METRICS.count("fetch_requests", status=response.status_code if error is None else "error")
+            if error is None and response.status_code not in RETRY_STATUSES:
+                self.limit.on_success(latency)
+                METRICS.page("fetch", url, latency)
+                METRICS.count("fetch_bytes", len(response.content))
+                if not (200 <= response.status_code < 300 or response.status_code == 304):
+                    raise FetchError(f"{url} answered HTTP {response.status_code}")
+                return response
+
+            self.limit.on_failure()
+            if attempt == self.max_retries:
+                break
+            with self.lock:
+                self.retries += 1
+            METRICS.count("fetch_retries")
+            reason = error or f"HTTP {response.status_code}"
+            delay = self.backoff(attempt + 1, response)
+            print(f"Retrying {url} in {delay:.1f}s ({reason})")
+            time.sleep(delay)
+
+        reason = error or f"HTTP {response.status_code}"
+        raise FetchError(f"Giving up on {url} after {self.max_retries + 1} attempts ({reason})")
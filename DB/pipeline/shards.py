@@ -0,0 +1,108 @@
+"""
+Per-level-bracket shards of each category, for the web client.
+
+The calculator only shows items of the wizard's level bracket (its
+getLevelBracket() brackets), so the Final stage also splits each category
+into one file per bracket, in <Category>_Data/<Category>_Shards/:
+
+    Amulets_1-29.json, Amulets_30-59.json, ..., Amulets_160-170.json
+
+Each shard is the Final items of that bracket, in Final order, with
+"Any Level" items in every shard and items without a level in none, as
+the dropdown filter has them. DB/Shards_Manifest.json lists every shard:
+
+    {"brackets": [[1, 29], ...],
+     "categories": {"Amulets": {"items": 1234, "shards": {
+         "160-170": {"file": "Amulets/Amulets_Data/Amulets_Shards/Amulets_160-170.json",
+                     "items": 211, "bytes": 180233}, ...}}, ...}}
+
+with file paths relative to DB/. Each category's own entry is also kept
+in <Category>_Shards/manifest.json, from which the manifest is merged.
+"""
+import json
+import os
+import threading
+
+from pipeline.profiles import DB_DIR, PROFILES, data_dir
+from pipeline.query import LEVEL_BRACKETS, item_level
+
+MANIFEST_FILE = os.path.join(DB_DIR, "Shards_Manifest.json")
+# Categories built on parallel threads all read and rewrite the manifests
+manifest_lock = threading.Lock()
+
+
+def shard_dir(profile):
+    return os.path.join(data_dir(profile), f"{profile.name}_Shards")
+
+
+def shard_file(profile, low, high):
+    return os.path.join(shard_dir(profile), f"{profile.name}_{low}-{high}.json")
+
+
+def in_bracket(item, low, high):
+    """
+    Whether the calculator shows the item for a level bracket.
+    """
+    level = item_level(item)
+    return level == "any" or (isinstance(level, int) and low <= level <= high)
+
+
+def category_manifest_file(profile):
+    return os.path.join(shard_dir(profile), "manifest.json")
+
+
+def write_shards(profile, items):
+    """
+    Write a category's bracket shards and refresh the manifest. `items`
+    may be any iterable; each item is written to its shards as it comes.
+    """
+    os.makedirs(shard_dir(profile), exist_ok=True)
+    files = {(low, high): open(shard_file(profile, low, high), "w", encoding="utf-8")
+             for low, high in LEVEL_BRACKETS}
+    counts = dict.fromkeys(files, 0)
+    total = 0
+    try:
+        for item in items:
+            total += 1
+            text = None
+            for (low, high), f in files.items():
+                if in_bracket(item, low, high):
+                    text = text or json.dumps(item, ensure_ascii=False, separators=(",", ":"))
+                    f.write("," if counts[low, high] else "[")
+                    f.write(text)
+                    counts[low, high] += 1
+        for bracket, f in files.items():
+            f.write("]" if counts[bracket] else "[]")
+    finally:
+        for f in files.values():
+            f.close()
+
+    shards = {}
+    for low, high in LEVEL_BRACKETS:
+        file = shard_file(profile, low, high)
+        shards[f"{low}-{high}"] = {
+            "file": os.path.relpath(file, DB_DIR).replace(os.sep, "/"),
+            "items": counts[low, high],
+            "bytes": os.path.getsize(file),
+        }
+    with manifest_lock, open(category_manifest_file(profile), "w", encoding="utf-8") as f:
+        json.dump({"items": total, "shards": shards}, f, separators=(",", ":"))
+    write_manifest()
+    sizes = ", ".join(str(entry["items"]) for entry in shards.values())
+    print(f"Level shards: {sizes} of {total} {profile.name} items, written to '{shard_dir(profile)}'")
+
+
+def write_manifest(path=MANIFEST_FILE):
+    """
+    Merge the per-category manifests into one, so it covers every category
+    regardless of which one was built last.
+    """
+    with manifest_lock:
+        categories = {}
+        for profile in PROFILES.values():
+            if os.path.exists(category_manifest_file(profile)):
+                with open(category_manifest_file(profile), "r", encoding="utf-8") as f:
+                    categories[profile.name] = json.load(f)
+        manifest = {"brackets": [list(bracket) for bracket in LEVEL_BRACKETS], "categories": categories}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, separators=(",", ":"))
@@ -0,0 +1,213 @@
+"""
+Local HTTP stand-in for the wiki, serving recorded pages.
+
+Record a sample of item pages once, then serve them locally to measure
+fetch throughput without touching the real wiki:
+
+    python -m pipeline.standin record Wands/Wands_Data/Wands_URL.json ./corpus --limit 200
+    python -m pipeline.standin serve ./corpus --port 8000 --delay 0.2
+    python -m pipeline.standin bench ./corpus --delay 0.2 --workers 1 8 16
+    python -m pipeline.standin bench ./corpus --error-rate 0.1 --slow-rate 0.05 --workers 16
+
+Run these from the DB folder. Recorded pages are stored one file per URL
+path; the stand-in answers any path it has a recording for and 404s the rest.
+Like the wiki it sends an ETag and Last-Modified and answers conditional
+requests with 304, so `bench --cache` shows the effect of the page cache.
+With --error-rate and --slow-rate it answers that share of requests with a
+429 or an extra --slow-delay, to exercise the request scheduler's retries
+and adaptive concurrency (see pipeline.scheduler).
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+from pipeline.cache import CachingScraper, PageCache
+from pipeline.fetch import create_scraper, fetch_pages
+from pipeline.scheduler import DEFAULT_MAX_RETRIES, RequestScheduler
+
+WIKI_BASE_URL = "https://wiki.wizard101central.com"
+
+
+def corpus_filename(url):
+    """
+    Map a wiki URL (or a bare request path) to its file name in a corpus folder.
+    """
+    parts = urlsplit(url)
+    path = parts.path + ("?" + parts.query if parts.query else "")
+    return quote(path, safe="") + ".html"
+
+
+def make_handler(corpus_dir, delay, error_rate=0.0, slow_rate=0.0, slow_delay=2.0):
+    """
+    Build a request handler class serving files from `corpus_dir`,
+    sleeping `delay` seconds per request to imitate wiki latency. A random
+    `error_rate` share of requests gets a 429, and a `slow_rate` share is
+    delayed by a further `slow_delay` seconds.
+    """
+    class StandInHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if delay:
+                time.sleep(delay)
+            if random.random() < slow_rate:
+                time.sleep(slow_delay)
+            if random.random() < error_rate:
+                self.respond(429)
+                return
+            path = os.path.join(corpus_dir, corpus_filename(self.path))
+            if not os.path.exists(path):
+                self.respond(404)
+                return
+            with open(path, "rb") as f:
+                body = f.read()
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.respond(304, headers={"ETag": etag})
+                return
+            self.respond(200, body, {
+                "Content-Type": "text/html; charset=utf-8",
+                "ETag": etag,
+                "Last-Modified": formatdate(os.path.getmtime(path), usegmt=True),
+            })
+
+        def respond(self, status, body=b"", headers=None):
+            self.server.status_counts[status] += 1
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInHandler
+
+
+def start_server(corpus_dir, port=0, delay=0.0, error_rate=0.0, slow_rate=0.0, slow_delay=2.0):
+    """
+    Start the stand-in on a background thread and return the server.
+    Its base URL is http://127.0.0.1:<server.server_port>.
+    """
+    handler = make_handler(corpus_dir, delay, error_rate, slow_rate, slow_delay)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.status_counts = Counter()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def corpus_urls(corpus_dir):
+    """
+    Return the wiki URLs recorded in `corpus_dir`, in file name order.
+    """
+    urls = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith(".html"):
+            urls.append(WIKI_BASE_URL + unquote(name[:-len(".html")]))
+    return urls
+
+
+def record(url_file, corpus_dir, limit):
+    """
+    Download the first `limit` item pages listed in `url_file` into `corpus_dir`.
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    with open(url_file, "r", encoding="utf-8") as f:
+        items = json.load(f)
+    urls = [item["url"] for item in items if item.get("url")][:limit]
+    scraper = create_scraper()
+    for url, html in fetch_pages(scraper, urls):
+        with open(os.path.join(corpus_dir, corpus_filename(url)), "w", encoding="utf-8") as f:
+            f.write(html)
+        print("Recorded:", url)
+
+
+def bench(corpus_dir, delay, worker_counts, cache_file=None, rate=0, max_retries=DEFAULT_MAX_RETRIES,
+          error_rate=0.0, slow_rate=0.0, slow_delay=2.0):
+    """
+    Fetch the whole corpus from a local stand-in once per worker count
+    and print pages/second, the response codes seen, the number of retries
+    and the concurrency the scheduler settled on for each run.
+    With `cache_file`, requests go through the page cache, so runs after
+    the first are answered with 304s.
+    """
+    server = start_server(corpus_dir, delay=delay, error_rate=error_rate,
+                          slow_rate=slow_rate, slow_delay=slow_delay)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    urls = corpus_urls(corpus_dir)
+    try:
+        for workers in worker_counts:
+            scheduler = RequestScheduler(create_scraper(workers), workers, rate, max_retries)
+            scraper = scheduler
+            if cache_file:
+                scraper = CachingScraper(scheduler, PageCache(cache_file))
+            server.status_counts.clear()
+            start = time.perf_counter()
+            count = sum(1 for _ in fetch_pages(scraper, urls, workers, base_url))
+            elapsed = time.perf_counter() - start
+            statuses = " ".join(f"{code}x{n}" for code, n in sorted(server.status_counts.items()))
+            print(f"workers={workers:<3} pages={count} time={elapsed:.2f}s "
+                  f"rate={count / elapsed:.1f} pages/s responses: {statuses} "
+                  f"retries={scheduler.retries} final_concurrency={scheduler.limit.limit}")
+    finally:
+        server.shutdown()
+
+
+def add_fault_arguments(parser):
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 429")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests delayed by --slow-delay")
+    parser.add_argument("--slow-delay", type=float, default=2.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local wiki stand-in serving recorded pages.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_record = sub.add_parser("record", help="record item pages from a <Category>_URL.json")
+    p_record.add_argument("url_file")
+    p_record.add_argument("corpus_dir")
+    p_record.add_argument("--limit", type=int, default=200)
+
+    p_serve = sub.add_parser("serve", help="serve a recorded corpus")
+    p_serve.add_argument("corpus_dir")
+    p_serve.add_argument("--port", type=int, default=8000)
+    p_serve.add_argument("--delay", type=float, default=0.0)
+    add_fault_arguments(p_serve)
+
+    p_bench = sub.add_parser("bench", help="measure pages/second against the stand-in")
+    p_bench.add_argument("corpus_dir")
+    p_bench.add_argument("--delay", type=float, default=0.2)
+    p_bench.add_argument("--workers", type=int, nargs="+", default=[1, 8, 16])
+    p_bench.add_argument("--cache", help="route requests through a page cache file")
+    p_bench.add_argument("--rate", type=float, default=0, help="scheduler requests/second limit (0 = unlimited)")
+    p_bench.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES)
+    add_fault_arguments(p_bench)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.url_file, args.corpus_dir, args.limit)
+    elif args.command == "serve":
+        server = start_server(args.corpus_dir, args.port, args.delay,
+                              args.error_rate, args.slow_rate, args.slow_delay)
+        print(f"Serving '{args.corpus_dir}' on http://127.0.0.1:{server.server_port}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+    else:
+        bench(args.corpus_dir, args.delay, args.workers, args.cache, args.rate, args.max_retries,
+              args.error_rate, args.slow_rate, args.slow_delay)
+
+
+if __name__ == "__main__":
+    main()
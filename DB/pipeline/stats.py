@@ -0,0 +1,110 @@
+"""
+Numeric form of the Final bonus mappings.
+
+Each Final item carries its bonuses twice: the display mappings in
+"bonuses" ({"Damage": {"Fire": "+15"}}, {"Health": "+595"}) and, in
+"stats", one [stat id, school id, value, is_percent] row per numeric
+value, e.g. [3, 1, 15, true] and [0, null, 595, false]. Ids index STATS
+and SCHOOLS below, which are also written to DB/Stat_IDs.json for the web
+client. Non-numeric bonuses ("Wizards Cannot Use", item cards, "Allows")
+have no row.
+
+Healing is split into "Incoming Healing" and "Outgoing Healing" by its
+qualifier, "Any"/"All" are kept as school "Any", and Damage and Resistance
+(shown on the wiki without a % sign) are always percentages. New stats or
+schools must be added at the end of the lists so existing ids don't change.
+
+parse_value and parse_level read bonus values and levels as the
+calculator does; pipeline.query and pipeline.store use them too.
+"""
+import json
+import os
+import re
+
+from pipeline.profiles import DB_DIR
+
+STAT_IDS_FILE = os.path.join(DB_DIR, "Stat_IDs.json")
+
+STATS = (
+    "Health", "Mana", "Energy",
+    "Damage", "Flat Damage", "Resistance", "Flat Resistance",
+    "Accuracy", "Critical", "Critical Block", "Armor Piercing", "Pip Conversion",
+    "Power Pip", "Pip", "Shadow Pip", "Archmastery", "Stun Resistance",
+    "Healing", "Incoming Healing", "Outgoing Healing", "Fishing Luck",
+)
+SCHOOLS = ("Global", "Fire", "Ice", "Storm", "Myth", "Life", "Death", "Balance", "Shadow", "Any")
+
+STAT_ID = {name: i for i, name in enumerate(STATS)}
+SCHOOL_ID = {name: i for i, name in enumerate(SCHOOLS)}
+SCHOOL_ALIASES = {"All": "Any"}
+HEALING_QUALIFIERS = {"Incoming": "Incoming Healing", "Outgoing": "Outgoing Healing"}
+PERCENT_STATS = {"Damage", "Resistance"}
+
+# The calculator's parse: drop "+", "%" and "," and parseFloat() the rest
+VALUE_NUMBER = re.compile(r"^\s*([+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)")
+LEVEL_NUMBER = re.compile(r"^\s*([+-]?\d+)")
+
+
+def parse_value(text):
+    """
+    Return the number in a bonus value ("+1,250" -> 1250, "+5% Chance" -> 5), or None.
+    """
+    match = VALUE_NUMBER.match(re.sub(r"[+%,]", "", text)) if isinstance(text, str) else None
+    if not match:
+        return None
+    value = float(match.group(1))
+    return int(value) if value.is_integer() else value
+
+
+def parse_level(text):
+    """
+    Return "any" for "Any Level", the minimum level in "150+" as an int, or None.
+    """
+    text = (text or "").lower().strip()
+    if text == "any level":
+        return "any"
+    match = LEVEL_NUMBER.match(text.replace("+", "", 1))
+    return int(match.group(1)) if match else None
+
+
+def stat_row(stat, school, text):
+    """
+    Return the [stat id, school id, value, is_percent] row of one value, or None.
+    """
+    if stat == "Healing" and school in HEALING_QUALIFIERS:
+        stat, school = HEALING_QUALIFIERS[school], None
+    school = SCHOOL_ALIASES.get(school, school)
+    value = parse_value(text)
+    if value is None or stat not in STAT_ID or (school is not None and school not in SCHOOL_ID):
+        return None
+    is_percent = stat in PERCENT_STATS or "%" in text or "Chance" in text
+    return [STAT_ID[stat], SCHOOL_ID.get(school), value, is_percent]
+
+
+def numeric_bonuses(bonuses):
+    """
+    Convert a Final "bonuses" list into its "stats" rows.
+    """
+    rows = []
+    for bonus in bonuses:
+        for stat, value in bonus.items():
+            pairs = value.items() if isinstance(value, dict) else [(None, value)]
+            for school, text in pairs:
+                row = stat_row(stat, school, text)
+                if row is not None:
+                    rows.append(row)
+    return rows
+
+
+def item_stats(item):
+    """
+    The "stats" rows of a Final item, computed from its bonuses for files
+    written before the Final stage added them.
+    """
+    stats = item.get("stats")
+    return stats if stats is not None else numeric_bonuses(item.get("bonuses", []))
+
+
+def write_stat_ids(path=STAT_IDS_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"stats": list(STATS), "schools": list(SCHOOLS)}, f, indent=2)
@@ -0,0 +1,171 @@
+"""
+SQLite item store written alongside the <Category>_Data.json files.
+
+The Final stage also loads its output into one database (DB/items.sqlite
+by default) so tools can look items up by index instead of scanning the
+JSON arrays:
+
+    items    one row per item: category, name, url, level (the number in
+             "150+", NULL for "Any Level"), trade flags, status, school,
+             socket count, and the Final record itself as JSON
+    bonuses  one row per bonus value: stat icon, school icon (NULL for
+             plain bonuses like Health), the text value and its leading
+             number as `amount`
+    sockets  one row per jewel socket shape
+
+For example, level 150+ Fire amulets with at least 15 Damage:
+
+    SELECT DISTINCT items.name FROM items JOIN bonuses ON bonuses.item_id = items.id
+    WHERE items.category = 'Amulets' AND items.level >= 150 AND items.school = 'Fire'
+      AND bonuses.stat = 'Damage' AND bonuses.amount >= 15
+"""
+import json
+import os
+import sqlite3
+import threading
+
+from pipeline.profiles import DB_DIR
+from pipeline.stats import parse_level, parse_value
+
+DEFAULT_STORE_FILE = os.path.join(DB_DIR, "items.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    url TEXT NOT NULL,
+    level INTEGER,
+    level_text TEXT,
+    tradeable INTEGER,
+    no_auction INTEGER,
+    status TEXT,
+    school TEXT,
+    sockets INTEGER,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bonuses (
+    item_id INTEGER NOT NULL REFERENCES items (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    stat TEXT NOT NULL,
+    school TEXT,
+    value TEXT,
+    amount REAL
+);
+CREATE TABLE IF NOT EXISTS sockets (
+    item_id INTEGER NOT NULL REFERENCES items (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    socket TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_name ON items (name);
+CREATE INDEX IF NOT EXISTS items_url ON items (category, url);
+CREATE INDEX IF NOT EXISTS items_category_level ON items (category, level);
+CREATE INDEX IF NOT EXISTS items_school ON items (school, level);
+CREATE INDEX IF NOT EXISTS bonuses_stat ON bonuses (stat, school, amount);
+CREATE INDEX IF NOT EXISTS bonuses_item ON bonuses (item_id);
+CREATE INDEX IF NOT EXISTS sockets_socket ON sockets (socket);
+CREATE INDEX IF NOT EXISTS sockets_item ON sockets (item_id);
+"""
+
+def level_column(text):
+    """
+    Return the minimum level in "150+" as an int, or None ("Any Level", "").
+    """
+    level = parse_level(text)
+    return level if isinstance(level, int) else None
+
+
+def item_school(item):
+    """
+    The school an item is filed under: its "School Type" when that is a
+    single school (as the calculator's school filter requires), or the
+    first school of a jewel.
+    """
+    school_type = item.get("School Type")
+    if isinstance(school_type, str):
+        return school_type
+    schools = item.get("school")
+    return schools[0] if schools else None
+
+
+def bonus_rows(bonuses):
+    """
+    Flatten Final bonus mappings into (position, stat, school, value, amount)
+    rows: {"Health": "+595"} is one row with no school, {"Damage": {"Fire":
+    "+15%"}} one row per inner school.
+    """
+    rows = []
+    for position, bonus in enumerate(bonuses):
+        for stat, value in bonus.items():
+            if isinstance(value, dict):
+                for school, inner_value in value.items():
+                    rows.append((position, stat, school, inner_value, parse_value(inner_value)))
+            else:
+                rows.append((position, stat, None, value, parse_value(value)))
+    return rows
+
+
+class ItemStore:
+    """
+    The item database; each category is written in one transaction.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_FILE):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def _insert(self, profile, items):
+        count = 0
+        for item in items:
+            count += 1
+            gear_sockets = item.get("sockets") if profile.final_rules != "jewel" else None
+            cursor = self.conn.execute(
+                "INSERT INTO items (category, name, url, level, level_text, tradeable, no_auction,"
+                " status, school, sockets, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    profile.name, item.get("Name", ""), item.get("url", ""),
+                    level_column(item.get("level")), item.get("level", ""),
+                    int(bool(item.get("tradeable"))), int(bool(item.get("no_auction"))),
+                    item.get("status", ""), item_school(item),
+                    gear_sockets[0] if gear_sockets else None,
+                    json.dumps(item, ensure_ascii=False),
+                ),
+            )
+            item_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO bonuses VALUES (?, ?, ?, ?, ?, ?)",
+                [(item_id,) + row for row in bonus_rows(item.get("bonuses", []))],
+            )
+            if profile.final_rules == "jewel":
+                self.conn.executemany(
+                    "INSERT INTO sockets VALUES (?, ?, ?)",
+                    [(item_id, i, socket) for i, socket in enumerate(dict.fromkeys(item.get("sockets", [])))],
+                )
+        return count
+
+    def replace_category(self, profile, items):
+        """
+        Replace every item of the profile's category with `items` (Final
+        records, any iterable). Returns the number of items written.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM items WHERE category = ?", (profile.name,))
+            return self._insert(profile, items)
+
+    def update_items(self, profile, items):
+        """
+        Replace the items of the profile's category that share a URL with
+        one of `items`, and add the rest.
+        """
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM items WHERE category = ? AND url = ?",
+                [(profile.name, item.get("url", "")) for item in items],
+            )
+            self._insert(profile, items)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,45 @@
+import json
+import os
+
+import pytest
+
+import pipeline.raw as raw
+from pipeline.archive import PageArchive, archive_file
+from pipeline.profiles import get_profile
+
+PROFILE = get_profile("Amulets")
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "Amulets")
+URL = "https://wiki.wizard101central.com/wiki/Item:Fixture_Plain_Charm"
+OLD_URL = "https://wiki.wizard101central.com/wiki/Item:Fixture_Card_Amulet"
+OLD_RECORD = {"url": OLD_URL, "title": "Fixture Card Amulet", "bonuses": []}
+
+
+@pytest.fixture
+def category(tmp_path, monkeypatch):
+    monkeypatch.setattr(raw, "url_file", lambda profile: str(tmp_path / "URL.json"))
+    monkeypatch.setattr(raw, "raw_file", lambda profile: str(tmp_path / "RAW.json"))
+    monkeypatch.setattr(raw, "journal_file", lambda profile: str(tmp_path / "RAW.jsonl"))
+    monkeypatch.setattr(raw, "data_dir", lambda profile: str(tmp_path))
+    (tmp_path / "URL.json").write_text(json.dumps([{"title": "Item:Fixture Card Amulet", "url": OLD_URL},
+                                                   {"title": "Item:Fixture Plain Charm", "url": URL}]))
+    (tmp_path / "RAW.json").write_text(json.dumps([OLD_RECORD]))
+    return tmp_path
+
+
+def test_missing_archive_fails_without_writing(category):
+    with pytest.raises(FileNotFoundError):
+        raw.run_raw(PROFILE, None, 1, archive_dir=str(category / "typo"), from_archive=True)
+    assert json.loads((category / "RAW.json").read_text()) == [OLD_RECORD]
+    assert sorted(os.listdir(category)) == ["RAW.json", "URL.json"]
+
+
+def test_items_missing_from_the_archive_are_kept(category):
+    with open(os.path.join(CORPUS_DIR, "%2Fwiki%2FItem%3AFixture_Plain_Charm.html"), encoding="utf-8") as f:
+        html = f.read()
+    archive = PageArchive(archive_file(PROFILE, str(category / "archive")))
+    archive.put(URL, html)
+    archive.close()
+    raw.run_raw(PROFILE, None, 1, archive_dir=str(category / "archive"), from_archive=True)
+    records = json.loads((category / "RAW.json").read_text())
+    assert [record["url"] for record in records] == [OLD_URL, URL]
+    assert records[0] == OLD_RECORD
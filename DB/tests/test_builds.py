@@ -0,0 +1,42 @@
+import io
+import json
+
+import pytest
+
+from pipeline.builds import run
+from pipeline.engine import StatEngine
+from pipeline.query import GearDB
+
+AMULET = {"Name": "Test Amulet", "level": "10+", "School Type": "Any", "sockets": [0],
+          "bonuses": [{"Health": "+100"}, {"Damage": {"Fire": "+5%"}}]}
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return StatEngine(GearDB({"Amulets": [AMULET]}))
+
+
+def evaluate(engine, *builds):
+    out = io.StringIO()
+    run(engine, [json.dumps(build) + "\n" for build in builds], out)
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_results_keep_the_build_id(engine):
+    results = evaluate(engine, {"id": "a", "gear": {"Amulet": "Test Amulet"}},
+                       {"id": "b", "gear": {"Amulet": "Missing Amulet"}},
+                       {"id": "c", "pets": [["damage", 5, "astral"]]},
+                       {"gear": {}})
+    assert [result["id"] for result in results] == ["a", "b", "c", 4]
+    assert results[0]["stats"]["Health"] == 100
+    assert results[0]["stats"]["Damage"]["fire"] == 5
+    assert results[1]["error"] == "No Amulets item named 'Missing Amulet'"
+    assert "Unknown school 'astral'" in results[2]["error"]
+
+
+def test_pet_talent_schools(engine):
+    totals = engine.totals_dict(engine.evaluate({}, pet_talents=[("damage", 5, "Fire"), ("accuracy", 2, None)]))
+    assert totals["Damage"]["fire"] == 5 and totals["Damage"]["ice"] == 0
+    assert totals["Accuracy"]["ice"] == 2
+    with pytest.raises(ValueError, match="Unknown school 'Astral'"):
+        engine.evaluate({}, pet_talents=[("damage", 5, "Astral")])
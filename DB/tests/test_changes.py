@@ -0,0 +1,12 @@
+import json
+
+from pipeline.changes import patch_file
+
+
+def test_patch_file_replaces_by_url_and_appends(tmp_path):
+    path = tmp_path / "Items.json"
+    path.write_text(json.dumps([{"url": "a", "v": 1}, {"url": "b", "v": 1}]), encoding="utf-8")
+    patch_file(str(path), [{"url": "b", "v": 2}, {"url": "c", "v": 1}])
+    assert json.loads(path.read_text(encoding="utf-8")) == [{"url": "a", "v": 1}, {"url": "b", "v": 2},
+                                                            {"url": "c", "v": 1}]
+    assert [p.name for p in tmp_path.iterdir()] == ["Items.json"]
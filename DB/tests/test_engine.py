@@ -0,0 +1,23 @@
+import json
+
+import pytest
+
+from pipeline.engine import StatEngine
+from pipeline.engineparity import CASES_FILE, differences
+from pipeline.query import GearDB
+
+with open(CASES_FILE, encoding="utf-8") as f:
+    CASES = json.load(f)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return StatEngine(GearDB(CASES["data"]))
+
+
+@pytest.mark.parametrize("number", range(len(CASES["builds"])))
+def test_totals_match_script_js(engine, number):
+    case = CASES["builds"][number]
+    totals = engine.evaluate(case["gear"], case["jewels"], [tuple(talent) for talent in case["pets"]])
+    assert differences(case["totals"], engine.totals_dict(totals)) == []
+
@@ -0,0 +1,46 @@
+from pipeline.frontier import compute_frontiers, dominates, item_features
+from pipeline.profiles import get_profile
+
+AMULETS = get_profile("Amulets")
+
+
+def amulet(name, health, extra=(), status="Active"):
+    return {"Name": name, "level": "160+", "status": status, "School Type": "Fire", "sockets": [0],
+            "bonuses": [{"Health": f"+{health}"}] + list(extra)}
+
+
+def fire_frontier(items):
+    frontiers, _ = compute_frontiers(AMULETS, items)
+    return frontiers["160-170"]["Fire"]
+
+
+def test_stats_alone_dominate():
+    assert fire_frontier([amulet("Strong", 600), amulet("Weak", 500)]) == [0]
+
+
+def test_card_giving_item_survives_stronger_item():
+    items = [amulet("Strong", 600), amulet("Card", 500, [{"Counter": {"Counter": "Item"}}])]
+    assert fire_frontier(items) == [0, 1]
+
+
+def test_card_giving_items_do_not_dominate_each_other():
+    card = [{"Counter": "Item Cards:"}]
+    assert fire_frontier([amulet("A", 600, card), amulet("B", 500, card)]) == [0, 1]
+
+
+def test_allows_pip_must_be_matched():
+    allows = [{"Fire": {"Power Pip": "Allows"}}]
+    assert fire_frontier([amulet("Strong", 600), amulet("Allows", 500, allows)]) == [0, 1]
+    assert fire_frontier([amulet("Strong", 600, allows), amulet("Allows", 500, allows)]) == [0]
+
+
+def test_retired_item_does_not_dominate_active_one():
+    assert fire_frontier([amulet("Retired", 600, status="Retired"), amulet("Active", 500)]) == [0, 1]
+    assert fire_frontier([amulet("Active", 600), amulet("Retired", 500, status="Retired")]) == [0]
+
+
+def test_equal_stats_more_features_dominates():
+    a = item_features(amulet("A", 500, [{"Fire": {"Power Pip": "Allows"}}]), 0)
+    b = item_features(amulet("B", 500), 1)
+    assert dominates({0: 500}, {0: 500}, a, b)
+    assert not dominates({0: 500}, {0: 500}, b, a)
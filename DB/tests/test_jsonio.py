@@ -0,0 +1,28 @@
+import io
+import json
+
+import pytest
+
+from pipeline.jsonio import dump_array, iter_array
+
+VALUES = [0.1, -12.5e-3, 1e5, 123456, True, None, "x", {"a": 1.5}, [2.25, 3], -0.0, 7]
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 20))
+def test_iter_array_across_chunk_boundaries(chunk_size):
+    text = json.dumps(VALUES)
+    assert list(iter_array(io.StringIO(text), chunk_size=chunk_size)) == VALUES
+    pairs = list(iter_array(io.StringIO(text), chunk_size=chunk_size, with_text=True))
+    assert [text for _, text in pairs] == [json.dumps(value) for value in VALUES]
+
+
+def test_dump_array_matches_json_dump():
+    out = io.StringIO()
+    dump_array(iter(VALUES), out)
+    assert out.getvalue() == json.dumps(VALUES, indent=2, ensure_ascii=False)
+    assert list(iter_array(io.StringIO(out.getvalue()), chunk_size=4)) == VALUES
+
+
+def test_truncated_array():
+    with pytest.raises(ValueError):
+        list(iter_array(io.StringIO("[1, 2"), chunk_size=2))
@@ -0,0 +1,19 @@
+import pipeline.memo as memo
+from pipeline.memo import TransformMemo
+from pipeline.profiles import get_profile
+
+PROFILE = get_profile("Jewels")
+
+
+def test_outputs_digest_follows_the_final_file(tmp_path, monkeypatch):
+    final = tmp_path / "Jewels_Data.json"
+    monkeypatch.setattr(memo, "final_file", lambda profile: str(final))
+    cache = TransformMemo(str(tmp_path / "cache.sqlite"))
+    final.write_text('[{"Name": "A"}]')
+    digest = cache.final_digest(PROFILE)
+    assert not cache.outputs_current(PROFILE, digest)
+    cache.record_outputs(PROFILE, digest)
+    assert cache.outputs_current(PROFILE, cache.final_digest(PROFILE))
+    final.write_text('[{"Name": "B"}]')
+    assert not cache.outputs_current(PROFILE, cache.final_digest(PROFILE))
+    cache.close()
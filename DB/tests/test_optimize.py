@@ -0,0 +1,66 @@
+import argparse
+from itertools import combinations_with_replacement, product
+
+import pytest
+
+from pipeline.optimize import item_vector, optimize, parse_pairs, usable
+from pipeline.query import GearDB
+
+
+def test_parse_pairs():
+    parser = argparse.ArgumentParser()
+    assert parse_pairs(parser, ["Damage:Fire=2", "Health"], default=1.0) == {"Damage:Fire": 2.0, "Health": 1.0}
+    assert parse_pairs(parser, ["Health=3000"]) == {"Health": 3000.0}
+
+
+@pytest.mark.parametrize("value", ["Health", "Health=", "Health=lots", "Damage:Astral=5"])
+def test_parse_pairs_rejects_bad_minimums(value):
+    with pytest.raises(SystemExit):
+        parse_pairs(argparse.ArgumentParser(), [value])
+
+
+def gear(name, fire, health, sockets, level="1+"):
+    return {"Name": name, "level": level, "School Type": "Any", "sockets": [sockets],
+            "bonuses": [{"Damage": {"Fire": f"+{fire}%"}}, {"Health": f"+{health}"}]}
+
+
+def jewel(name, fire, health, shape="Circle"):
+    return {"Name": name, "level": "1+", "sockets": [shape],
+            "bonuses": [{"Damage": {"Fire": f"+{fire}%"}}, {"Health": f"+{health}"}]}
+
+
+DATA = {
+    "Amulets": [gear("A1", 5, 0, 0), gear("A2", 3, 100, 1), gear("A3", 1, 50, 2), gear("A4", 9, 0, 1, "200+")],
+    "Rings": [gear("R1", 4, 20, 1), gear("R2", 2, 200, 0), gear("R3", 0, 0, 2)],
+    "Decks": [gear("D1", 6, 0, 0), gear("D2", 1, 10, 3)],
+    "Jewels": [jewel("J1", 3, 0), jewel("J2", 1, 60), jewel("J3", 2, 20, "Triangle"), jewel("J4", 50, 0, "Star"),
+               jewel("J5", 0, 90, "Square")],
+}
+SLOTS = ["Amulets", "Rings", "Decks"]
+
+
+def brute_force(weights, minimums, level):
+    # Every choice per slot (or none), every multiset of usable jewels for the sockets
+    choices = [[None] + [item for item in DATA[slot] if usable(item, level, "Fire")] for slot in SLOTS]
+    jewels = [item for item in DATA["Jewels"] if usable(item, level, "Fire", jewel=True)]
+    scores = []
+    for picked in product(*choices):
+        items = [item for item in picked if item]
+        sockets = sum(item["sockets"][0] for item in items)
+        for extra in combinations_with_replacement(jewels, sockets):
+            vectors = [item_vector(item, weights, minimums) for item in items + list(extra)]
+            total = [sum(values) for values in zip(*vectors)] or [0] * (1 + len(minimums))
+            if all(value >= floor for value, floor in zip(total[1:], minimums.values())):
+                scores.append(total[0])
+    return sorted(scores, reverse=True)
+
+
+@pytest.mark.parametrize("minimums", [{}, {"Health": 150}, {"Health": 400}, {"Health": 10000}])
+@pytest.mark.parametrize("level", [10, 200])
+def test_optimize_matches_brute_force(minimums, level):
+    weights = {"Damage:Fire": 1.0}
+    builds = optimize(GearDB(DATA), level, "Fire", weights, minimums, top=5, slots=SLOTS)
+    assert [objective for objective, _, _, _ in builds] == brute_force(weights, minimums, level)[:5]
+    for _, totals, _, jewels in builds:
+        assert all(totals[name] >= floor for name, floor in minimums.items())
+        assert "J4" not in jewels
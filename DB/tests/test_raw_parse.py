@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+from pipeline.parsebench import corpus_pages, parse_modes
+from pipeline.profiles import get_profile
+from pipeline.raw import pending_items
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+PAGES = [(category, title, url, html)
+         for category in sorted(os.listdir(CORPUS_DIR))
+         for title, url, html in corpus_pages(os.path.join(CORPUS_DIR, category))]
+
+
+@pytest.mark.parametrize("category, title, url, html", PAGES, ids=[page[2].rsplit("/", 1)[-1] for page in PAGES])
+def test_modes_match_original_extractor(category, title, url, html):
+    item_title = pending_items([{"title": title, "url": url}])[0][0]
+    results = parse_modes(html, url, item_title, get_profile(category))
+    assert results["default"][0] == results["original"][0]
+    assert results["fast"][0] == results["original"][0]
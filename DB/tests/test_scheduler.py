@@ -0,0 +1,60 @@
+import pytest
+import requests
+
+from pipeline.scheduler import FetchError, RequestScheduler
+
+
+class Response:
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode()
+        self.headers = {}
+
+
+class Session:
+    """Answers with the given statuses in turn."""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.timeouts = []
+
+    def get(self, url, **kwargs):
+        self.timeouts.append(kwargs.get("timeout"))
+        status = self.statuses.pop(0)
+        if status is None:
+            raise requests.ReadTimeout("stalled")
+        return Response(status, "page")
+
+
+def scheduler(*statuses):
+    return RequestScheduler(Session(*statuses), 2, rate=0, max_retries=2, backoff_base=0.001)
+
+
+def test_throttled_requests_are_retried():
+    pages = scheduler(429, 503, 200)
+    assert pages.get("http://wiki/a").text == "page"
+    assert pages.retries == 2
+
+
+def test_gives_up_after_the_last_retry():
+    with pytest.raises(FetchError, match="after 3 attempts"):
+        scheduler(429, 429, 429).get("http://wiki/a")
+
+
+@pytest.mark.parametrize("status", [403, 404])
+def test_client_errors_are_not_parsed(status):
+    with pytest.raises(FetchError, match=f"HTTP {status}"):
+        scheduler(status).get("http://wiki/a")
+
+
+def test_not_modified_is_passed_on():
+    assert scheduler(304).get("http://wiki/a").status_code == 304
+
+
+def test_requests_time_out_and_are_retried():
+    pages = scheduler(None, 200)
+    pages.timeout = (1, 2)
+    assert pages.get("http://wiki/a").text == "page"
+    assert pages.session.timeouts == [(1, 2), (1, 2)]
+    assert pages.retries == 1
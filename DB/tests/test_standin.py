@@ -0,0 +1,71 @@
+import os
+import random
+
+import pytest
+
+from pipeline.cache import CachingScraper, PageCache
+from pipeline.fetch import create_scraper, fetch_pages
+from pipeline.scheduler import FetchError, RequestScheduler
+from pipeline.standin import corpus_filename, corpus_urls, start_server
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "Amulets")
+URLS = corpus_urls(CORPUS_DIR)
+WORKERS = 4
+
+
+def recorded(url):
+    with open(os.path.join(CORPUS_DIR, corpus_filename(url)), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture
+def standin(request):
+    server = start_server(CORPUS_DIR, **getattr(request, "param", {}))
+    yield server, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def scheduler(max_retries=0):
+    return RequestScheduler(create_scraper(WORKERS), WORKERS, rate=0, max_retries=max_retries, backoff_base=0.01)
+
+
+@pytest.mark.parametrize("standin", [{"slow_rate": 0.5, "slow_delay": 0.05}], indirect=True)
+def test_pages_come_back_in_input_order(standin):
+    _, base_url = standin
+    urls = URLS * 3
+    pages = list(fetch_pages(scheduler(), urls, WORKERS, base_url))
+    assert [url for url, _ in pages] == urls
+    assert [html for _, html in pages] == [recorded(url) for url in urls]
+
+
+def test_cached_pages_are_revalidated(standin, tmp_path):
+    server, base_url = standin
+    cache = PageCache(str(tmp_path / "pages.sqlite"))
+    scraper = CachingScraper(scheduler(), cache)
+    try:
+        first = list(fetch_pages(scraper, URLS, WORKERS, base_url))
+        assert server.status_counts == {200: len(URLS)}
+        server.status_counts.clear()
+        second = list(fetch_pages(scraper, URLS, WORKERS, base_url))
+    finally:
+        cache.close()
+    assert server.status_counts == {304: len(URLS)}
+    assert second == first
+
+
+@pytest.mark.parametrize("standin", [{"error_rate": 0.3}], indirect=True)
+def test_throttled_pages_are_retried(standin):
+    server, base_url = standin
+    random.seed(3)
+    pages = scheduler(max_retries=20)
+    fetched = list(fetch_pages(pages, URLS * 5, WORKERS, base_url))
+    assert [html for _, html in fetched] == [recorded(url) for url in URLS * 5]
+    assert server.status_counts[429] > 0
+    assert pages.retries == server.status_counts[429]
+
+
+def test_missing_page_raises(standin):
+    _, base_url = standin
+    with pytest.raises(FetchError, match="HTTP 404"):
+        list(fetch_pages(scheduler(), ["https://wiki.wizard101central.com/wiki/Item:Missing"], 1, base_url))
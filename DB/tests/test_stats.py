@@ -0,0 +1,28 @@
+import pytest
+
+from pipeline.query import bonus_value, item_level
+from pipeline.stats import parse_level, parse_value
+from pipeline.store import bonus_rows, level_column
+
+
+@pytest.mark.parametrize("text, value", [
+    ("+1,250", 1250), ("+5% Chance", 5), ("-100%", -100), ("+0.5%", 0.5), (".5", 0.5),
+    ("++8% Chance", 8), ("Allows", None), ("", None), (None, None),
+])
+def test_parse_value(text, value):
+    assert parse_value(text) == value
+
+
+@pytest.mark.parametrize("text, level", [("150+", 150), ("Any Level", "any"), (" any level ", "any"), ("", None), (None, None)])
+def test_parse_level(text, level):
+    assert parse_level(text) == level
+
+
+def test_query_and_store_parse_like_stats():
+    item = {"level": "Any Level", "bonuses": [{"Health": "+1,250"}, {"Damage": {"Fire": "+12%"}}, {"Pip": "Allows"}]}
+    assert item_level(item) == "any"
+    assert level_column(item["level"]) is None
+    assert bonus_value(item, "Health") == 1250
+    assert bonus_value(item, "Damage") == 12
+    assert bonus_value(item, "Pip") == 0
+    assert [row[4] for row in bonus_rows(item["bonuses"])] == [1250, 12, None]